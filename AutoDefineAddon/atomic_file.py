@@ -0,0 +1,37 @@
+""" files replaced atomically
+
+The content is written to a temporary file next to the target and renamed over
+it once complete, so a reader (or a crash half way) never sees a partly
+written file. The temporary file is removed when writing fails.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def replacing(path, mode='wb', encoding=None, prefix=None, suffix='.tmp'):
+    """ yield a file open for writing, that replaces path when the block ends without an exception
+
+    prefix, suffix - of the temporary file name, e.g. to hide it or tell it apart from finished files
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=prefix, suffix=suffix)
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write(path, data):
+    """ replace path with bytes data """
+    with replacing(path) as f:
+        f.write(data)
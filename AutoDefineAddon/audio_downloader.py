@@ -0,0 +1,122 @@
+""" background audio download queue with atomic, verified writes
+
+Downloads run on the downloader's own worker threads. Each file is streamed in
+chunks to a temporary file next to its target, checked (size announced by the
+server, non-empty, mp3/ogg signature) and only then renamed into place, so an
+interrupted download never leaves a truncated file in collection.media.
+"""
+
+import contextvars
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from . import atomic_file, http_client
+
+DEFAULT_MAX_WORKERS = 4
+CHUNK_SIZE = 64 * 1024
+
+
+class AudioDownloadError(Exception):
+    """ downloaded file is incomplete or not an audio file """
+    pass
+
+
+def looks_like_audio(head):
+    """ check the first bytes of a file for an mp3 (ID3 tag or frame sync) or ogg signature """
+    if head.startswith(b'ID3') or head.startswith(b'OggS'):
+        return True
+    return len(head) >= 2 and head[0] == 0xFF and (head[1] & 0xE0) == 0xE0
+
+
+class AudioDownloader(object):
+    """ queue of audio downloads, identical targets in flight share one download
+
+    max_workers - number of files downloaded at once
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = {}
+        self._stats = {'downloaded': 0, 'bytes': 0, 'failed': 0, 'coalesced': 0}
+
+    def submit(self, url, path, headers=None, timeout=None):
+        """ queue download of url to path, return a Future resolved when path is in place """
+        with self._lock:
+            future = self._pending.get(path)
+            if future is not None:
+                self._stats['coalesced'] += 1
+                return future
+
+            if os.path.exists(path):
+                future = Future()
+                future.set_result(path)
+                return future
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='AutoDefineAudio')
+            # in the caller's context, so a download for the editor fails fast like its other requests
+            future = self._executor.submit(contextvars.copy_context().run, self._download, url, path, headers, timeout)
+            self._pending[path] = future
+
+        future.add_done_callback(lambda _: self._done(path))
+        return future
+
+    def prefetch(self, items, headers=None, timeout=None):
+        """ queue every (url, path) of items without waiting, return their futures """
+        return [self.submit(url, path, headers=headers, timeout=timeout) for url, path in items]
+
+    def _done(self, path):
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def _download(self, url, path, headers, timeout):
+        try:
+            # hidden .part file, renamed into place only once it is checked
+            with atomic_file.replacing(path, prefix='.' + os.path.basename(path) + '.', suffix='.part') as f:
+                response = http_client.get(url, headers=headers, timeout=timeout, stream=True)
+                try:
+                    response.raise_for_status()
+                    expected_size = response.headers.get('Content-Length')
+                    size = 0
+                    head = b''
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        if len(head) < 4:
+                            head += chunk[:4]
+                        f.write(chunk)
+                        size += len(chunk)
+                finally:
+                    response.close()
+
+                if size == 0:
+                    raise AudioDownloadError(f"{url}: empty response")
+                if expected_size is not None and expected_size.isdigit() and int(expected_size) != size \
+                        and 'Content-Encoding' not in response.headers:
+                    raise AudioDownloadError(f"{url}: got {size} of {expected_size} bytes")
+                if not looks_like_audio(head):
+                    raise AudioDownloadError(f"{url}: not an audio file")
+        except BaseException:
+            with self._lock:
+                self._stats['failed'] += 1
+            raise
+
+        with self._lock:
+            self._stats['downloaded'] += 1
+            self._stats['bytes'] += size
+        return path
+
+    def stats(self):
+        """ Return: {'downloaded': <files>, 'bytes': <bytes written>, 'failed': <failed downloads>,
+        'coalesced': <requests served by a download already queued>} """
+        with self._lock:
+            return dict(self._stats)
+
+    def shutdown(self):
+        """ stop the worker threads, queued downloads are dropped """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -16,15 +16,31 @@ from aqt import mw, gui_hooks
 from aqt.utils import tooltip
 from aqt.utils import askUser, askUserDialog
 from bs4 import BeautifulSoup
-import requests
 import webbrowser
 import importlib.util
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait as wait_futures
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from contextlib import contextmanager
 import pathlib
-from .oxford import Word, WordNotFound
+import requests
+from .oxford import Word, WordNotFound, PARSER_VERSION, parse_events as parse_oxford_events
 from .laban import Word as LabanWord, WordNotFound as LabanWordNotFound
-from http import cookiejar
+from . import http_client
+from . import http_cache
+from . import entry_cache
+from . import entry_model
+from . import resolution_index
+from . import io_pool
+from . import singleflight
+from . import negative_cache
+from . import media_index
+from . import html_backend
+from .audio_downloader import AudioDownloader, DEFAULT_MAX_WORKERS as AUDIO_DEFAULT_MAX_WORKERS
+from .throttle import HostUnavailableError
+from .prefetch import SpeculativePrefetcher, DEFAULT_DELAY as PREFETCH_DEFAULT_DELAY
+from .prewarm import Prewarmer, DEFAULT_REQUEST_BUDGET as PREWARM_DEFAULT_REQUEST_BUDGET
 from aqt.addcards import AddCards
 from aqt.editor import Editor
 from aqt.qt import *
@@ -95,6 +111,42 @@ section = '7. Vietnamese definition'
 VI_DEFINITION = get_config_value(section, " 1. VI_DEFINITION", True)
 VI_DEFINITION_FIELD = get_config_value(section, " 2. VI_DEFINITION_FIELD", 6)
 
+section = '8. network'
+POOL_CONNECTIONS = get_config_value(section, " 1. POOL_CONNECTIONS", http_client.DEFAULT_POOL_CONNECTIONS)
+POOL_MAXSIZE = get_config_value(section, " 2. POOL_MAXSIZE", http_client.DEFAULT_POOL_MAXSIZE)
+HTTP_CACHE = get_config_value(section, " 3. HTTP_CACHE", True)
+HTTP_CACHE_TTL_HOURS = get_config_value(section, " 4. HTTP_CACHE_TTL_HOURS", 168)
+ENTRY_CACHE = get_config_value(section, " 5. ENTRY_CACHE", True)
+RESOLUTION_INDEX = get_config_value(section, " 6. RESOLUTION_INDEX", True)
+FETCH_WORKERS = get_config_value(section, " 7. FETCH_WORKERS", io_pool.DEFAULT_MAX_WORKERS)
+OXFORD_TIMEOUT = get_config_value(section, " 8. OXFORD_TIMEOUT", 15)
+LABAN_TIMEOUT = get_config_value(section, " 9. LABAN_TIMEOUT", 15)
+AUDIO_TIMEOUT = get_config_value(section, "10. AUDIO_TIMEOUT", 15)
+REQUESTS_PER_SECOND = get_config_value(section, "11. REQUESTS_PER_SECOND", http_client.DEFAULT_REQUESTS_PER_SECOND)
+MAX_RETRIES = get_config_value(section, "12. MAX_RETRIES", http_client.DEFAULT_MAX_RETRIES)
+CIRCUIT_BREAKER_THRESHOLD = get_config_value(section, "13. CIRCUIT_BREAKER_THRESHOLD",
+                                             http_client.DEFAULT_BREAKER_THRESHOLD)
+CIRCUIT_BREAKER_COOLDOWN = get_config_value(section, "14. CIRCUIT_BREAKER_COOLDOWN",
+                                            http_client.DEFAULT_BREAKER_COOLDOWN)
+NEGATIVE_CACHE = get_config_value(section, "15. NEGATIVE_CACHE", True)
+NEGATIVE_CACHE_TTL_HOURS = get_config_value(section, "16. NEGATIVE_CACHE_TTL_HOURS", 24)
+NEGATIVE_CACHE_BLOOM = get_config_value(section, "17. NEGATIVE_CACHE_BLOOM", True)
+AUDIO_WORKERS = get_config_value(section, "18. AUDIO_WORKERS", AUDIO_DEFAULT_MAX_WORKERS)
+
+section = '9. bulk'
+BULK_WORKERS = get_config_value(section, " 1. BULK_WORKERS", 4)
+
+section = '10. prefetch'
+PREFETCH_WHILE_TYPING = get_config_value(section, " 1. PREFETCH_WHILE_TYPING", True)
+PREFETCH_DELAY_MS = get_config_value(section, " 2. PREFETCH_DELAY_MS", int(PREFETCH_DEFAULT_DELAY * 1000))
+PREWARM_IDLE = get_config_value(section, " 3. PREWARM_IDLE", True)
+PREWARM_REQUEST_BUDGET = get_config_value(section, " 4. PREWARM_REQUEST_BUDGET", PREWARM_DEFAULT_REQUEST_BUDGET)
+PREWARM_START_DELAY_SECONDS = get_config_value(section, " 5. PREWARM_START_DELAY_SECONDS", 60)
+
+section = '11. parsing'
+OXFORD_PARSER = get_config_value(section, " 1. OXFORD_PARSER", "tree")
+HTML_PARSER = get_config_value(section, " 2. HTML_PARSER", html_backend.DEFAULT)
+
 if CORPUS.lower() == 'british':
     CORPUS_TAGS_PRIORITIZED = ['BrE', 'nAmE']
 elif CORPUS.lower() == 'american':
@@ -102,12 +154,30 @@ elif CORPUS.lower() == 'american':
 else:
     raise Exception("Unknown CORPUS " + CORPUS)
 
-
-class BlockAll(cookiejar.CookiePolicy):
-    """ policy to block cookies """
-    return_ok = set_ok = domain_return_ok = path_return_ok = lambda self, *args, **kwargs: False
-    netscape = True
-    rfc2965 = hide_cookie2 = False
+# sections of the oxford entries the enabled fields are built from, oxford is not asked at all without any
+OXFORD_SECTIONS = frozenset((['definitions', 'idioms', 'verb_forms'] if DEFINITION else []) +
+                            (['pronunciations'] if AUDIO or PHONETICS else []) +
+                            (['verb_forms'] if VERB_FORMS else []))
+
+USER_FILES_PATH = os.path.join(os.path.dirname(__file__), "user_files")
+
+http_client.configure(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+http_client.configure_throttling(requests_per_second=REQUESTS_PER_SECOND, max_retries=MAX_RETRIES,
+                                 breaker_threshold=CIRCUIT_BREAKER_THRESHOLD,
+                                 breaker_cooldown=CIRCUIT_BREAKER_COOLDOWN)
+io_pool.configure(max_workers=FETCH_WORKERS)
+http_cache.configure(os.path.join(USER_FILES_PATH, "http_cache") if HTTP_CACHE else None,
+                     ttl=HTTP_CACHE_TTL_HOURS * 60 * 60)
+# falls back to html.parser when the configured backend is not installed
+HTML_PARSER_IN_USE = html_backend.configure(HTML_PARSER)
+# other backends may build slightly different trees, their entries are kept apart
+ENTRY_CACHE_VERSION = PARSER_VERSION if HTML_PARSER_IN_USE == html_backend.DEFAULT or OXFORD_PARSER == "events" \
+    else f"{PARSER_VERSION}-{HTML_PARSER_IN_USE}"
+entry_cache.configure(os.path.join(USER_FILES_PATH, "entries") if ENTRY_CACHE else None, ENTRY_CACHE_VERSION)
+negative_cache.configure(os.path.join(USER_FILES_PATH, "not_found.sqlite") if NEGATIVE_CACHE else None,
+                         ttl=NEGATIVE_CACHE_TTL_HOURS * 60 * 60, use_bloom=NEGATIVE_CACHE_BLOOM)
+resolution_index.configure(os.path.join(USER_FILES_PATH, "resolution_index.jsonl") if RESOLUTION_INDEX else None,
+                           ttl=HTTP_CACHE_TTL_HOURS * 60 * 60)
 
 
 @contextmanager
@@ -144,6 +214,14 @@ HEADERS = {
                   'Chrome/118.0.0.0 Safari/537.36'
 }
 
+audio_downloader = AudioDownloader(max_workers=AUDIO_WORKERS)
+
+# the prefetch only fills the caches, without them it would be wasted
+prefetcher = SpeculativePrefetcher(lambda word: prefetch_word(word), delay=PREFETCH_DELAY_MS / 1000,
+                                   enabled=PREFETCH_WHILE_TYPING and (HTTP_CACHE or ENTRY_CACHE))
+
+prewarmer = Prewarmer(lambda word: warm_word(word), request_budget=PREWARM_REQUEST_BUDGET)
+
 
 def focus_zero_field(editor):
     if TEST_MODE:
@@ -227,68 +305,177 @@ def replace_word_in_sentence(words_to_replace_lists, sentence, highlight):
 
 
 def get_data(note, is_bulk):
-    try:
-        word = get_word(note)
-        if word == "":
-            raise AutoDefineError("There is no word in SOURCE_FIELD")
+    word = get_word(note)
+    prefetched = prefetcher.take(word) if not is_bulk else None
+    if prefetched is not None:
+        data = apply_data(note, word, lambda: use_prefetched_data(prefetched, word))
+    else:
+        data = apply_data(note, word, lambda: fetch_data(word, is_bulk))
+
+    if OPEN_IMAGES_IN_BROWSER and not is_bulk:
+        link = OPEN_IMAGES_IN_BROWSER_LINK.replace("$", data['word'] + SEARCH_APPEND)
+        webbrowser.open(
+            link,
+            0, False)
+
+
+def fetch_data(word, is_bulk):
+    """ download and parse everything needed for word without touching the note,
+    safe to run off the main thread when is_bulk is True
+
+    Return: {
+            'word': <word the fields were built for>,
+            'fields': {<field index>: <field content>, ...},
+            'word_not_replaced': <True/False, None when DEFINITION is disabled>,
+            'errors': [<message of a secondary source (Laban, audio) that failed or timed out>, ...],
+            'audio': <downloads still running when is_bulk, see finish_audio()>
+            }
+    """
+    if word == "":
+        raise AutoDefineError("There is no word in SOURCE_FIELD")
+
+    fields = {}
+    word_not_replaced = None
+    errors = []
 
-        if CLEAN_HTML_IN_SOURCE_FIELD:
-            insert_into_field(note, word, SOURCE_FIELD, overwrite=True)
+    # Laban does not depend on Oxford, start it right away
+    laban_future = io_pool.submit(get_laban_word_info, word) if VI_DEFINITION else None
+
+    (words_info, idioms) = get_words_info(word) if OXFORD_SECTIONS else ([], [])
+
+    if len(words_info) == 0 and OXFORD_SECTIONS:
+        raise AutoDefineError(f"Word not found in dictionary")
+
+    found_word = get_word_name(words_info) if OXFORD_SECTIONS else word
+    if found_word != word:
+        if TEST_MODE or is_bulk:
+            raise AutoDefineError(f"Found definition for word '{found_word}' instead'")
+        else:
+            if askUser(f"Attention! found another word '{found_word}', replace source field?"):
+                fields[SOURCE_FIELD] = found_word
+                word = found_word
+                if laban_future is not None:
+                    laban_future.cancel()
+                    laban_future = io_pool.submit(get_laban_word_info, word)
 
-        (words_info, idioms) = get_words_info(word)
+    # audio downloads run while definitions and phonetics are built
+    if AUDIO:
+        audio_dict = get_audio_dict(words_info)
+        audio_futures = start_audio_downloads(audio_dict)
 
-        if len(words_info) == 0:
-            raise AutoDefineError(f"Word not found in dictionary")
+    verb_forms = get_verb_forms(words_info)
 
-        found_word = get_word_name(words_info)
-        if found_word != word:
-            if TEST_MODE or is_bulk:
-                raise AutoDefineError(f"Found definition for word '{found_word}' instead'")
+    if DEFINITION:
+        (fields[DEFINITION_FIELD], word_not_replaced) = get_definition_html(words_info, verb_forms, idioms)
+
+    if VI_DEFINITION:
+        try:
+            word_info = laban_future.result(timeout=LABAN_TIMEOUT)
+            if word_info is None:
+                errors.append("Word not found in Laban dictionary")
             else:
-                if askUser(f"Attention! found another word '{found_word}', replace source field?"):
-                    insert_into_field(note, found_word, SOURCE_FIELD, overwrite=True)
-                    word = found_word
+                fields[VI_DEFINITION_FIELD] = get_laban_definition_html(word_info, word)
+        except FutureTimeoutError:
+            errors.append(f"Laban dictionary did not answer in {LABAN_TIMEOUT} seconds")
+        except (requests.RequestException, HostUnavailableError) as error:
+            # the Oxford fields are kept, like when an audio download fails
+            errors.append(f"Laban dictionary failed: {error}")
+
+    if PHONETICS:
+        fields[PHONETICS_FIELD] = get_phonetics(words_info)
+
+    if VERB_FORMS:
+        fields[VERB_FORMS_FIELD] = str.join(' ', verb_forms)
+
+    data = {'word': word, 'fields': fields, 'word_not_replaced': word_not_replaced, 'errors': errors,
+            'audio': (audio_dict, audio_futures) if AUDIO else None}
+
+    # bulk runs join the downloads later, so workers can parse the next words meanwhile
+    if not is_bulk:
+        finish_audio(data)
+    return data
+
+
+def use_prefetched_data(future, word):
+    """ wait for the prefetch of word to fill the caches, then build the fields from them """
+    try:
+        future.result()
+    except Exception:
+        pass  # whatever failed is asked again, and reported, by the fetch below
+    return fetch_data(word, is_bulk=False)
+
+
+def prefetch_word(word):
+    """ warm the caches for a word that is still being typed, it may never be defined so nothing is
+    written to collection.media, and nothing is retried """
+    with http_client.fail_fast():
+        warm_word(word)
+
+
+def prefetch_typed_word(note):
+    """ start warming the caches for the word of the Add Cards editor while the user is still typing """
+    if add_dialog is None or add_dialog.editor.note is not note or len(note.fields) <= SOURCE_FIELD:
+        return
+    prefetcher.schedule(get_word(note))
+
+
+def warm_word(word):
+    """ fill the http and entry caches for word without building any field """
+    if OXFORD_SECTIONS:
+        get_words_info(word)
+    if VI_DEFINITION:
+        get_laban_word_info(word)
+
+
+def start_prewarm():
+    """ warm the caches for notes of the default note type whose definition is still empty """
+    model = mw.col.models.by_name(DEFAULT_TEMPLATE_NAME)
+    if model is None or len(model['flds']) <= max(SOURCE_FIELD, DEFINITION_FIELD):
+        return
+    definition_field_name = model['flds'][DEFINITION_FIELD]['name']
+    nids = mw.col.find_notes(f'"note:{DEFAULT_TEMPLATE_NAME}" "{definition_field_name}:"')
+    if PREWARM_REQUEST_BUDGET > 0:
+        # every word costs at least one request, no need to read more notes than that
+        nids = nids[:PREWARM_REQUEST_BUDGET]
+    words = [get_word(mw.col.getNote(nid)) for nid in nids]
+    prewarmer.start([word for word in words if word != ""])
+
+
+def schedule_prewarm():
+    QTimer.singleShot(int(PREWARM_START_DELAY_SECONDS * 1000), start_prewarm)
 
-        verb_forms = get_verb_forms(words_info)
 
-        if DEFINITION:
-            insert_into_field(note, '', DEFINITION_FIELD, overwrite=True)
-            (definition_html, need_word_not_replaced_tag) = get_definition_html(words_info, verb_forms, idioms)
-            insert_into_field(note, definition_html, DEFINITION_FIELD, overwrite=False)
+def apply_data(note, word, fetch):
+    """ write the result of fetch() into note, tags the note if anything fails
 
-            if need_word_not_replaced_tag:
+    word - cleaned content of SOURCE_FIELD
+    fetch - callable returning fetch_data() result or raising its error
+    """
+    try:
+        if word != "" and CLEAN_HTML_IN_SOURCE_FIELD:
+            insert_into_field(note, word, SOURCE_FIELD, overwrite=True)
+
+        data = fetch()
+
+        for field_id, text in data['fields'].items():
+            insert_into_field(note, text, field_id, overwrite=True)
+
+        if data['word_not_replaced'] is not None:
+            if data['word_not_replaced']:
                 if WORD_NOT_REPLACED_TAG_NAME not in note.tags:
                     note.tags.append(WORD_NOT_REPLACED_TAG_NAME)
             else:
                 if WORD_NOT_REPLACED_TAG_NAME in note.tags:
                     note.tags.remove(WORD_NOT_REPLACED_TAG_NAME)
 
-        if VI_DEFINITION:
-            word_instance = LabanWord(word)
-            word_info = word_instance.get_info()
-            definition_html = get_laban_definition_html(word_info, word)
-            insert_into_field(note, definition_html, VI_DEFINITION_FIELD, overwrite=True)
-
-        if PHONETICS:
-            phonetics = get_phonetics(words_info)
-            insert_into_field(note, phonetics, PHONETICS_FIELD, overwrite=True)
-
-        if AUDIO:
-            audio = get_audio(words_info)
-            insert_into_field(note, audio, AUDIO_FIELD, overwrite=True)
-
-        if VERB_FORMS_FIELD:
-            insert_into_field(note, str.join(' ', verb_forms), VERB_FORMS_FIELD, overwrite=True)
-
-        if OPEN_IMAGES_IN_BROWSER and not is_bulk:
-            link = OPEN_IMAGES_IN_BROWSER_LINK.replace("$", word + SEARCH_APPEND)
-            webbrowser.open(
-                link,
-                0, False)
+        if len(data['errors']) > 0:
+            raise AutoDefineError("; ".join(data['errors']))
 
         if ERROR_TAG_NAME in note.tags:
             note.tags.remove(ERROR_TAG_NAME)
 
+        return data
+
     except Exception as error:
         if ERROR_TAG_NAME not in note.tags:
             note.tags.append(ERROR_TAG_NAME)
@@ -318,17 +505,78 @@ def get_verb_forms(words_info):
     return forms
 
 
+def get_oxford_info(word, is_search):
+    """ return (info, idioms) of oxford page, identical lookups in flight share one fetch and parse """
+    return singleflight.do(('oxford', word, is_search), load_oxford_info, word, is_search)
+
+
+def load_oxford_info(word, is_search):
+    """ return (info, idioms) of oxford page, pages parsed before are taken from entry_cache
+
+    info is an entry_model.Entry, read like the dict of Word.info()
+    """
+    page_content = Word.fetch(word, HEADERS, is_search=is_search, timeout=OXFORD_TIMEOUT)
+    page_hash = entry_cache.page_hash(page_content)
+    entry = entry_cache.load(page_hash, None if is_search else word, OXFORD_SECTIONS)
+    if entry is None:
+        entry = parse_oxford_page(page_content)
+        entry_cache.store(page_hash, entry, OXFORD_SECTIONS)
+    return entry, entry.get('idioms', [])
+
+
+def parse_oxford_page(page_content):
+    """ return entry_model.Entry of downloaded oxford page, only OXFORD_SECTIONS are extracted """
+    if OXFORD_PARSER == "events":
+        return entry_model.from_info(parse_oxford_events(page_content, OXFORD_SECTIONS))
+
+    page = Word(page_content)
+    try:
+        return entry_model.from_info(page.info(OXFORD_SECTIONS))
+    finally:
+        page.close()
+
+
 def get_words_info(request_word):
+    word_to_search = request_word.replace(" ", "-").lower()
+
+    resolved = resolution_index.get(word_to_search)
+    if resolved is not None:
+        try:
+            return get_resolved_words_info(*resolved)
+        except WordNotFound:
+            # one of the entries moved or disappeared, search again
+            resolution_index.remove(word_to_search)
+
+    if negative_cache.contains('oxford', word_to_search):
+        return [], []
+
+    (words_info, idioms) = search_words_info(word_to_search)
+    if len(words_info) == 0:
+        negative_cache.add('oxford', word_to_search)
+    return words_info, idioms
+
+
+def get_resolved_words_info(primary_id, sibling_ids):
+    """ words info of a query resolved before, straight from the definition pages """
+    futures = [io_pool.submit(get_oxford_info, entry_id, False) for entry_id in [primary_id] + sibling_ids]
+    (word_info, idioms) = futures[0].result()
+    words_info = [word_info]
+    for future in futures[1:]:
+        (sibling_info, _) = future.result()
+        words_info.append(sibling_info)
+    return words_info, idioms
+
+
+def search_words_info(word_to_search):
     words_info = []
     idioms = []
-    word_to_search = request_word.replace(" ", "-").lower()
+    sibling_ids = []
     try:
-        Word.get(word_to_search, HEADERS, is_search=True)
-
-        word_info = Word.info()
-        idioms = Word.idioms()
+        (word_info, idioms) = get_oxford_info(word_to_search, is_search=True)
         words_info.append(word_info)
+        primary_id = word_info['id']
         word_name = word_info['name'].lower()
+        matches = []
         other_results = word_info.get('other_results')
         if other_results is not None:
             for other_result in other_results:
@@ -336,13 +584,20 @@ def get_words_info(request_word):
                 if all_matches is not None:
                     for match in all_matches:
                         if word_name == match['name'].strip().lower():
-                            try:
-                                Word.get(match['id'], HEADERS, is_search=False)
-                                word_info = Word.info()
-                                if word_info['name'].lower() == word_name:
-                                    words_info.append(Word.info())
-                            except WordNotFound:
-                                pass
+                            matches.append(match)
+
+        # siblings are fetched concurrently and collected in the order of "All matches"
+        futures = [io_pool.submit(get_oxford_info, match['id'], False) for match in matches]
+        for match, future in zip(matches, futures):
+            try:
+                (word_info, _) = future.result()
+                if word_info['name'].lower() == word_name:
+                    words_info.append(word_info)
+                    sibling_ids.append(match['id'])
+            except WordNotFound:
+                pass
+
+        resolution_index.put(word_to_search, primary_id, sibling_ids)
 
     except WordNotFound:
         pass
@@ -434,15 +689,21 @@ def get_definition_html(word_infos, verb_forms, idioms):
     return BeautifulSoup(''.join(strings), 'html.parser').prettify(), need_word_not_replaced_tag
 
 def get_laban_word_info(request_word):
+    return singleflight.do(('laban', request_word), load_laban_word_info, request_word)
+
+
+def load_laban_word_info(request_word):
     word_info = None
+    if negative_cache.contains('laban', request_word):
+        return word_info
     try:
-        word = LabanWord(request_word, HEADERS)
+        word = LabanWord(request_word, HEADERS, timeout=LABAN_TIMEOUT)
 
         word_info = word.get_info()
         return word_info
 
     except LabanWordNotFound:
-        pass
+        negative_cache.add('laban', request_word)
 
 
 def get_laban_definition_html(word_info, word):
@@ -519,7 +780,9 @@ def fill_phonetics_dict_prioritized(phonetics_dict, pronunciations, wordform):
                 return
 
 
-def get_audio(word_infos):
+def get_audio_dict(word_infos):
+    if media_index.directory() is None:
+        index_media_folder()
     audio_dict = {}
     for word_info in word_infos:
         wordform = word_info.get("wordform")
@@ -527,7 +790,10 @@ def get_audio(word_infos):
             wordform = "none"
         pronunciations = word_info.get("pronunciations")
         fill_audio_dict_prioritized(audio_dict, pronunciations, wordform)
+    return audio_dict
 
+
+def get_audio_html(audio_dict):
     if len(audio_dict) == 0:
         return "<span class=\"do_not_show\">No audio found</span>"
     elif len(audio_dict) == 1:
@@ -537,6 +803,12 @@ def get_audio(word_infos):
                              ", ".join(audio_dict[key]['wordform']) for key in iter(audio_dict)])
 
 
+def index_media_folder():
+    """ point media_index at collection.media of the open collection """
+    collection_path = pathlib.Path(mw.col.path).parent.absolute()
+    media_index.configure(os.path.join(collection_path, "collection.media"))
+
+
 def fill_audio_dict_prioritized(audio_dict, pronunciations, wordform):
     for corpus_tag in CORPUS_TAGS_PRIORITIZED:
         for pronunciation in pronunciations:
@@ -545,24 +817,59 @@ def fill_audio_dict_prioritized(audio_dict, pronunciations, wordform):
 
                 audio_name = audio_url.split('/')[-1]
 
-                collection_path = pathlib.Path(mw.col.path).parent.absolute()
-                media_path = os.path.join(collection_path, "collection.media")
-                audio_path = os.path.join(media_path, audio_name)
+                audio_path = media_index.path(audio_name)
+                if audio_path is None:
+                    raise AutoDefineError("No collection is open to save the audio to")
 
                 value = audio_dict.get(audio_name, None)
                 if value is not None:
                     value['wordform'].append(wordform)
                 else:
-                    if not os.path.exists(audio_path):
-                        req = requests.Session()
-                        req.cookies.set_policy(BlockAll())
-                        response = req.get(audio_url, timeout=5, headers=HEADERS)
-                        with open(audio_path, 'wb') as f:
-                            f.write(response.content)
-                    audio_dict[audio_name] = {'wordform': [wordform], "audio_name": audio_name}
+                    audio_dict[audio_name] = {'wordform': [wordform], "audio_name": audio_name,
+                                              'audio_url': audio_url, 'audio_path': audio_path}
                 return
 
 
+def start_audio_downloads(audio_dict):
+    """ queue every audio of audio_dict missing from collection.media,
+    return the futures of the downloads """
+    missing = [audio for audio in audio_dict.values() if not media_index.contains(audio['audio_name'])]
+    futures = audio_downloader.prefetch([(audio['audio_url'], audio['audio_path']) for audio in missing],
+                                        headers=HEADERS, timeout=AUDIO_TIMEOUT)
+    for (audio, future) in zip(missing, futures):
+        future.add_done_callback(lambda future, name=audio['audio_name']: index_saved_audio(future, name))
+    return futures
+
+
+def index_saved_audio(future, audio_name):
+    if not future.cancelled() and future.exception() is None:
+        media_index.add(audio_name)
+
+
+def finish_audio(data):
+    """ wait for the audio downloads started by fetch_data() and fill the audio field of data,
+    does nothing if they were already joined """
+    if data.get('audio') is None:
+        return
+    (audio_dict, audio_futures) = data.pop('audio')
+
+    (_, not_done) = wait_futures(audio_futures, timeout=AUDIO_TIMEOUT)
+    # downloads are cancelled when the profile closes during a bulk run
+    cancelled = [future for future in audio_futures if future.cancelled()]
+    download_errors = [future.exception() for future in audio_futures if future.done() and not future.cancelled()]
+    host_errors = [error for error in download_errors if isinstance(error, HostUnavailableError)]
+    if len(not_done) > 0:
+        data['errors'].append(f"Audio was not downloaded in {AUDIO_TIMEOUT} seconds")
+    elif len(cancelled) > 0:
+        data['errors'].append("Audio was not downloaded, the download was cancelled")
+    elif len(host_errors) > 0:
+        raise host_errors[0]
+    elif any(error is not None for error in download_errors):
+        data['errors'].append("Audio download failed")
+    else:
+        data['fields'][AUDIO_FIELD] = get_audio_html(audio_dict)
+
+
 def insert_into_field(note, text, field_id, overwrite=False):
     if len(note.fields) <= field_id:
         raise AutoDefineError(
@@ -583,6 +890,15 @@ def clean_html(raw_html):
 def new_add_cards(addcards: AddCards):
     global add_dialog
     add_dialog = addcards
+    addcards.finished.connect(lambda _: close_add_cards(addcards))
+
+
+def close_add_cards(addcards: AddCards):
+    """ drop the prefetch of the word typed in the closed Add Cards window """
+    global add_dialog
+    if add_dialog is addcards:
+        add_dialog = None
+        prefetcher.cancel()
 
 
 def switch_model(name):
@@ -1056,41 +1372,101 @@ def bulkDefine(browser):
         return
     mw.checkpoint("AutoDefine")
     mw.progress.start(immediate=True, max=len(ids))
+    prewarmer.pause()
     browser.model.beginReset()
 
     errors = []
+    deferred = []
 
     def process(nids, mw):
-        count = 0
         max = len(nids)
-        for nid in nids:
+        notes = [mw.col.getNote(nid) for nid in nids]
+        words = [get_word(note) for note in notes]
+
+        # network and parsing run off the main thread, notes are only changed on the main thread
+        count = 0
+        for index, fetch in fetch_bulk_data(words):
             count += 1
-            note = mw.col.getNote(nid)
-            word = None
+            note = notes[index]
+            word = words[index]
+            mw.taskman.run_on_main(
+                lambda c=count, w=word, m=max: mw.progress.update(value=c, label=w, process=False, max=m)
+            )
             try:
-                word = get_word(note)
-                mw.taskman.run_on_main(
-                    lambda c=count, w=word, m=max: mw.progress.update(value=c, label=w, process=False, max=m)
-                )
-                get_data(note, is_bulk=True)
+                finish_audio(fetch())
+            except HostUnavailableError:
+                # a dictionary host keeps failing or asked to slow down, leave the note untouched for a later run
+                deferred.append(word)
+                continue
+            except Exception:
+                pass  # reported below, when the note is tagged
 
+            try:
+                run_on_main_and_wait(lambda n=note, w=word, f=fetch: apply_bulk_data(n, w, f))
             except AutoDefineError as error:
-                save_error(count, error.message, word, errors)
+                save_error(index + 1, error.message, word, errors)
             except Exception as ex:
-                save_error(count, "Exception", word, errors)
-            note.flush()
+                save_error(index + 1, "Exception", word, errors)
 
     def onFinish(future):
+        prewarmer.resume()
         browser.model.endReset()
         mw.requireReset()
         mw.progress.finish()
         mw.reset()
+        if len(deferred) > 0:
+            errors.append(f"{len(deferred)} notes were skipped because the dictionary site kept failing "
+                          f"or asked to slow down, run bulk define on them again later: {', '.join(deferred)}")
         if len(errors) > 0:
             askUserDialog("\n".join(errors), ['OK'], title='Bulk operation finished with some errors', parent=browser) \
                 .run()
 
     mw.taskman.run_in_background(process, onFinish, args={"nids": ids, "mw": mw})
 
+def max_bulk_workers():
+    try:
+        return max(1, int(BULK_WORKERS))
+    except (TypeError, ValueError):
+        return 1
+
+
+def fetch_bulk_data(words):
+    """ yield (index, fetch) as soon as data of words[index] is ready,
+    fetch() returns the fetch_data() result or raises its error """
+    with ThreadPoolExecutor(max_workers=max_bulk_workers()) as executor:
+        futures = {executor.submit(fetch_data, word, True): index for index, word in enumerate(words)}
+        for future in as_completed(futures):
+            yield futures[future], future.result
+
+
+def apply_bulk_data(note, word, fetch):
+    try:
+        apply_data(note, word, fetch)
+    finally:
+        note.flush()
+
+
+def run_on_main_and_wait(func):
+    """ run func on the main thread, block the calling background thread until it is done
+    and return its result (or raise its exception) """
+    done = threading.Event()
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = func()
+        except Exception as error:
+            outcome['error'] = error
+        finally:
+            done.set()
+
+    mw.taskman.run_on_main(run)
+    done.wait()
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('result')
+
+
 def save_error(count, error_text, word, errors):
     if word is not None and word != "":
         errors.append(f"{word}: {error_text}")
@@ -1098,6 +1474,7 @@ def save_error(count, error_text, word, errors):
         errors.append(f"Word number {count}: {error_text}")
 
 def get_data_with_exception_handling(editor: Editor):
+    prewarmer.pause()
     try:
         if USE_DEFAULT_TEMPLATE:
             addCustomModel(mw.col, DEFAULT_TEMPLATE_NAME)
@@ -1105,9 +1482,13 @@ def get_data_with_exception_handling(editor: Editor):
 
         note = editor.note
         try:
-            get_data(note, is_bulk=False)
+            # the main thread waits for this lookup, it must not sit out retries
+            with http_client.fail_fast():
+                get_data(note, is_bulk=False)
         except AutoDefineError as error:
             tooltip(error.message, period=10000)
+        except HostUnavailableError as error:
+            tooltip(str(error), period=10000)
 
         flush_note(note)
         mw.requireReset()
@@ -1118,6 +1499,8 @@ def get_data_with_exception_handling(editor: Editor):
         raise Exception("\n\nATTENTION! Please copy this error massage and open an issue on \n"
                         "https://github.com/artyompetrov/AutoDefine_oxfordlearnersdictionaries/issues \n"
                         "so I could investigate the reason of error and fix it") from ex
+    finally:
+        prewarmer.resume()
 
 
 def flush_note(note):
@@ -1127,6 +1510,13 @@ def flush_note(note):
         pass
 
 
+def purge_not_found_word(changed, note, field_idx):
+    # the user may have fixed a misspelling or wants to retry, ask the dictionaries again
+    if field_idx == SOURCE_FIELD and len(note.fields) > SOURCE_FIELD:
+        negative_cache.purge(get_word(note))
+    return changed
+
+
 def setup_buttons(buttons, editor):
     both_button = editor.addButton(icon=os.path.join(os.path.dirname(__file__), "images", "icon30.png"),
                                    cmd="AD",
@@ -1154,6 +1544,19 @@ addHook("browser.setupMenus", setupMenu)
 
 addHook("setupEditorButtons", setup_buttons)
 gui_hooks.add_cards_did_init.append(new_add_cards)
+gui_hooks.editor_did_unfocus_field.append(purge_not_found_word)
+gui_hooks.editor_did_fire_typing_timer.append(prefetch_typed_word)
+gui_hooks.profile_did_open.append(index_media_folder)
+if PREWARM_IDLE:
+    gui_hooks.profile_did_open.append(schedule_prewarm)
+gui_hooks.profile_will_close.append(prefetcher.shutdown)
+gui_hooks.profile_will_close.append(prewarmer.stop)
+gui_hooks.profile_will_close.append(io_pool.shutdown)
+gui_hooks.profile_will_close.append(audio_downloader.shutdown)
+gui_hooks.profile_will_close.append(http_client.close)
+gui_hooks.profile_will_close.append(negative_cache.close)
+gui_hooks.profile_will_close.append(resolution_index.close)
+gui_hooks.profile_will_close.append(media_index.reset)
 
 
 class AutoDefineError(Exception):
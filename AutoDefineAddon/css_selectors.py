@@ -0,0 +1,95 @@
+""" CSS selectors of the scrapers, compiled once and reused
+
+Tag.select() hands its selector string to soupsieve, which parses it again on
+every call (or at best looks it up in its own cache). The scrapers register
+their selectors when they are imported, so a lookup only runs the compiled
+matcher. Compile time and the number of uses of every selector are kept for
+profiling, see stats() and report().
+"""
+
+import threading
+import time
+
+try:
+    import soupsieve
+except ImportError:
+    soupsieve = None
+
+_lock = threading.Lock()
+_selectors = {}
+_late = []
+
+
+class Selector(object):
+    """ a compiled selector, counts how often it was used, the count is guarded by the registry lock """
+    __slots__ = ('pattern', 'matcher', 'compile_time', 'hits')
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        start = time.perf_counter()
+        self.matcher = soupsieve.compile(pattern) if soupsieve is not None else None
+        self.compile_time = time.perf_counter() - start
+        self.hits = 0
+
+    def select(self, tag, limit=0):
+        """ same as tag.select(pattern) """
+        # the scrapers run on several threads at once (io_pool, bulk, prefetch)
+        with _lock:
+            self.hits += 1
+        if self.matcher is None:
+            # bs4 raises a NotImplementedError explaining that soupsieve is missing
+            return tag.select(self.pattern, limit=limit)
+        return self.matcher.select(tag, limit)
+
+
+def register(*patterns):
+    """ compile patterns that are not registered yet """
+    with _lock:
+        for pattern in patterns:
+            if pattern not in _selectors:
+                _selectors[pattern] = Selector(pattern)
+
+
+def get(pattern):
+    """ compiled selector of pattern, a pattern that was not registered is compiled now and reported by stats() """
+    selector = _selectors.get(pattern)
+    if selector is None:
+        with _lock:
+            selector = _selectors.get(pattern)
+            if selector is None:
+                selector = _selectors[pattern] = Selector(pattern)
+                _late.append(pattern)
+    return selector
+
+
+def select(tag, pattern):
+    """ same as tag.select(pattern) with a compiled selector """
+    return get(pattern).select(tag)
+
+
+def stats():
+    """ Return: {'selectors': <registered selectors>, 'compile_ms': <time spent compiling>, 'hits': <uses>,
+    'late': [<patterns compiled on first use instead of at import>]} """
+    with _lock:
+        selectors = list(_selectors.values())
+        late = list(_late)
+    return {
+        'selectors': len(selectors),
+        'compile_ms': sum(selector.compile_time for selector in selectors) * 1000,
+        'hits': sum(selector.hits for selector in selectors),
+        'late': late,
+    }
+
+
+def report():
+    """ one line per selector, most used first: hits, compile time and pattern """
+    with _lock:
+        selectors = sorted(_selectors.values(), key=lambda selector: (-selector.hits, selector.pattern))
+    return [f"{selector.hits:8d} hits {selector.compile_time * 1000:7.3f} ms  {selector.pattern}"
+            for selector in selectors]
+
+
+def reset_hits():
+    with _lock:
+        for selector in _selectors.values():
+            selector.hits = 0
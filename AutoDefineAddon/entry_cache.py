@@ -0,0 +1,130 @@
+""" cache of parsed oxford entries keyed by entry id and parser version
+
+Layout of the cache directory:
+    <parser version>.<FORMAT>/entries/<entry id>.entry - hash of the page it was parsed from, sections
+                                                         extracted and the entry_model.Entry, with marshal
+    <parser version>.<FORMAT>/pages/<page hash> - entry id parsed from that page, lets search pages
+                                                  (whose entry id is unknown before parsing) be found too
+
+An entry is only reused when the page it was parsed from is byte-identical to
+the page just fetched, so a changed page is parsed again, and when it holds
+every section asked for, so enabling a field parses the page again. Entries of other
+parser versions or formats are never read and their folders are removed on configure.
+"""
+
+import hashlib
+import marshal
+import os
+import shutil
+import threading
+from urllib.parse import quote
+
+from . import atomic_file, entry_model
+
+# bump when the layout of the entry files changes
+FORMAT = 2
+
+_lock = threading.Lock()
+_directory = None
+_stats = {'hits': 0, 'misses': 0}
+
+
+def configure(directory, parser_version):
+    """ directory - where to keep the cache, None disables caching
+    parser_version - version stamp of the parser, entries of other versions are dropped
+    """
+    global _directory
+    stamp = f"{parser_version}.{FORMAT}"
+    with _lock:
+        if directory is None:
+            _directory = None
+            return
+        _directory = os.path.join(directory, stamp)
+
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name != stamp:
+                shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def page_hash(page_content):
+    """ hash identifying the exact page an entry is parsed from """
+    return hashlib.sha256(page_content).hexdigest()
+
+
+def _entry_path(directory, entry_id):
+    return os.path.join(directory, 'entries', quote(entry_id, safe='') + '.entry')
+
+
+def _page_path(directory, content_hash):
+    return os.path.join(directory, 'pages', content_hash)
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def _read_record(directory, entry_id):
+    """ Return: (<page hash>, <sections or None>, <encoded entry>), None if missing or unreadable """
+    try:
+        with open(_entry_path(directory, entry_id), 'rb') as f:
+            record = marshal.load(f)
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+    return record if type(record) is tuple and len(record) == 3 else None
+
+
+def load(content_hash, entry_id=None, sections=None):
+    """ return the entry_model.Entry parsed from the page with content_hash, None if not cached
+
+    entry_id - id of the requested entry if known (definition pages), when it is
+               unknown (search pages) or differs from the page's id it is looked up
+               from the page hash
+    sections - sections of info() needed, None if any entry will do
+    """
+    with _lock:
+        directory = _directory
+    if directory is None:
+        return None
+
+    record = _read_record(directory, entry_id) if entry_id is not None else None
+    if record is None or record[0] != content_hash:
+        try:
+            with open(_page_path(directory, content_hash), 'r', encoding='utf-8') as f:
+                record = _read_record(directory, f.read())
+        except OSError:
+            record = None
+
+    if record is None or record[0] != content_hash or not _covers(record[1], sections):
+        _count('misses')
+        return None
+
+    _count('hits')
+    return entry_model.decode(record[2])
+
+
+def _covers(stored_sections, sections):
+    # entries stored without sections were extracted in full
+    return sections is None or stored_sections is None or set(sections) <= set(stored_sections)
+
+
+def store(content_hash, entry, sections=None):
+    """ remember the entry_model.Entry parsed from the page with content_hash
+
+    sections - sections the entry was extracted with, None if all of them
+    """
+    with _lock:
+        directory = _directory
+    if directory is None or entry is None or not entry.get('id'):
+        return
+
+    record = (content_hash, None if sections is None else tuple(sorted(sections)), entry_model.encode(entry))
+    atomic_file.write(_entry_path(directory, entry['id']), marshal.dumps(record))
+    atomic_file.write(_page_path(directory, content_hash), entry['id'].encode('utf-8'))
+
+
+def stats():
+    """ Return: {'hits': <parses skipped>, 'misses': <pages parsed>} """
+    with _lock:
+        return dict(_stats)
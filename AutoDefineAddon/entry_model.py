@@ -0,0 +1,264 @@
+""" compact model of the parsed oxford entries
+
+Word.info() gives nested dicts and lists. Entry keeps the same data in
+__slots__ records and tuples, with the strings that repeat from entry to entry
+(wordforms, labels, prefixes, headers...) interned. Every record is a read-only
+Mapping with the keys of the dict it was built from, so code written for the
+dicts reads an Entry unchanged: lists are given as lists, records as Mappings.
+A key the dict did not have is a slot that is not set.
+
+dumps() and loads() turn an Entry into compact bytes and back: records are
+written with marshal as tuples of their values after a bit mask of the keys
+they have, so no key is written at all.
+"""
+
+import marshal
+import sys
+from collections.abc import Mapping
+
+MAGIC = b'ADE\x01'
+
+# kinds of values
+TEXT = 'text'  # str or None
+NAME = 'name'  # str or None, interned
+TEXTS = 'texts'  # list of str, kept as a tuple
+VERB_FORMS = 'verb_forms'  # None or {form: {'prefix': ..., 'value': ...}}, kept as a tuple of VerbForm
+RESULT_GROUPS = 'result_groups'  # [{header: [{'name': ..., 'id': ..., 'wordform': ...}]}], a tuple of ResultGroup
+
+
+def _intern(text):
+    return sys.intern(text) if type(text) is str else text
+
+
+class Record(Mapping):
+    """ base of the records: FIELDS lists (key, kind) in the order of the dict, a kind is
+    one of the kinds above, a Record subclass (a record or None) or a 1-tuple (Record subclass,)
+    for a list of records """
+    __slots__ = ()
+    FIELDS = ()
+    KINDS = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.KINDS = dict(cls.FIELDS)
+
+    @classmethod
+    def from_dict(cls, values):
+        record = cls.__new__(cls)
+        for key, kind in cls.FIELDS:
+            if key in values:
+                setattr(record, key, _pack(kind, values[key]))
+        return record
+
+    def to_dict(self):
+        """ the dict the record was built from """
+        return {key: _unpack(kind, getattr(self, key)) for key, kind in self.FIELDS if hasattr(self, key)}
+
+    def __getitem__(self, key):
+        kind = self.KINDS.get(key)
+        if kind is None or not hasattr(self, key):
+            raise KeyError(key)
+        return _view(kind, getattr(self, key))
+
+    def __iter__(self):
+        return (key for key, _ in self.FIELDS if hasattr(self, key))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def _encode(self):
+        mask = 0
+        values = []
+        for bit, (key, kind) in enumerate(self.FIELDS):
+            if hasattr(self, key):
+                mask |= 1 << bit
+                values.append(_encode(kind, getattr(self, key)))
+        return (mask,) + tuple(values)
+
+    @classmethod
+    def _decode(cls, encoded):
+        record = cls.__new__(cls)
+        mask = encoded[0]
+        values = iter(encoded[1:])
+        for bit, (key, kind) in enumerate(cls.FIELDS):
+            if mask & (1 << bit):
+                setattr(record, key, _decode(kind, next(values)))
+        return record
+
+
+class Reference(Record):
+    __slots__ = ('id', 'name')
+    FIELDS = (('id', TEXT), ('name', TEXT))
+
+
+class Pronunciation(Record):
+    __slots__ = ('prefix', 'ipa', 'ogg', 'mp3')
+    FIELDS = (('prefix', NAME), ('ipa', TEXT), ('ogg', TEXT), ('mp3', TEXT))
+
+
+class Definition(Record):
+    __slots__ = ('property', 'label', 'refer', 'references', 'description', 'examples', 'extra_example')
+    FIELDS = (('property', NAME), ('label', NAME), ('refer', TEXT), ('references', (Reference,)),
+              ('description', TEXT), ('examples', TEXTS), ('extra_example', TEXTS))
+
+
+class Namespace(Record):
+    __slots__ = ('namespace', 'definitions')
+    FIELDS = (('namespace', NAME), ('definitions', (Definition,)))
+
+
+class IdiomDefinition(Record):
+    __slots__ = ('description', 'label', 'refer', 'references', 'examples')
+    FIELDS = (('description', TEXT), ('label', NAME), ('refer', TEXT), ('references', (Reference,)),
+              ('examples', TEXTS))
+
+
+class IdiomSummary(Record):
+    __slots__ = ('label', 'refer', 'references')
+    FIELDS = (('label', NAME), ('refer', TEXT), ('references', (Reference,)))
+
+
+class Idiom(Record):
+    __slots__ = ('name', 'summary', 'definitions')
+    FIELDS = (('name', TEXT), ('summary', IdiomSummary), ('definitions', (IdiomDefinition,)))
+
+
+class Result(Record):
+    __slots__ = ('name', 'id', 'wordform')
+    FIELDS = (('name', TEXT), ('id', TEXT), ('wordform', NAME))
+
+
+class ResultGroup(object):
+    """ one {header: [Result, ...]} of other_results """
+    __slots__ = ('header', 'results')
+
+    def __init__(self, header, results):
+        self.header = header
+        self.results = results
+
+
+class VerbForm(Record):
+    """ one form of verb_forms, form is the key it is found under """
+    __slots__ = ('form', 'prefix', 'value')
+    FIELDS = (('prefix', NAME), ('value', TEXT))
+
+
+class Entry(Record):
+    """ Word.info() of one page """
+    __slots__ = ('id', 'name', 'wordform', 'pronunciations', 'property', 'definitions', 'idioms', 'other_results',
+                 'phrasal_verbs', 'verb_forms')
+    FIELDS = (('id', TEXT), ('name', TEXT), ('wordform', NAME), ('pronunciations', (Pronunciation,)),
+              ('property', NAME), ('definitions', (Namespace,)), ('idioms', (Idiom,)),
+              ('other_results', RESULT_GROUPS), ('phrasal_verbs', (Reference,)), ('verb_forms', VERB_FORMS))
+
+
+def _pack(kind, value):
+    if kind is TEXT:
+        return value
+    if kind is NAME:
+        return _intern(value)
+    if kind is TEXTS:
+        return tuple(value)
+    if kind is VERB_FORMS:
+        if value is None:
+            return None
+        forms = []
+        for form, values in value.items():
+            verb_form = VerbForm.from_dict(values)
+            verb_form.form = _intern(form)
+            forms.append(verb_form)
+        return tuple(forms)
+    if kind is RESULT_GROUPS:
+        return tuple(ResultGroup(_intern(header), tuple(Result.from_dict(result) for result in results))
+                     for group in value for header, results in group.items())
+    if type(kind) is tuple:
+        return tuple(kind[0].from_dict(item) for item in value)
+    return None if value is None else kind.from_dict(value)
+
+
+def _view(kind, value):
+    if kind is TEXT or kind is NAME or value is None:
+        return value
+    if kind is VERB_FORMS:
+        return {verb_form.form: verb_form for verb_form in value}
+    if kind is RESULT_GROUPS:
+        return [{group.header: list(group.results)} for group in value]
+    if kind is TEXTS or type(kind) is tuple:
+        return list(value)
+    return value
+
+
+def _unpack(kind, value):
+    if kind is TEXT or kind is NAME or value is None:
+        return value
+    if kind is TEXTS:
+        return list(value)
+    if kind is VERB_FORMS:
+        return {verb_form.form: verb_form.to_dict() for verb_form in value}
+    if kind is RESULT_GROUPS:
+        return [{group.header: [result.to_dict() for result in group.results]} for group in value]
+    if type(kind) is tuple:
+        return [item.to_dict() for item in value]
+    return value.to_dict()
+
+
+def _encode(kind, value):
+    if kind is TEXT or kind is NAME or kind is TEXTS or value is None:
+        return value
+    if kind is VERB_FORMS:
+        return tuple((verb_form.form,) + verb_form._encode() for verb_form in value)
+    if kind is RESULT_GROUPS:
+        return tuple((group.header, tuple(result._encode() for result in group.results)) for group in value)
+    if type(kind) is tuple:
+        return tuple(item._encode() for item in value)
+    return value._encode()
+
+
+def _decode(kind, value):
+    if kind is TEXT or kind is TEXTS or value is None:
+        return value
+    if kind is NAME:
+        return _intern(value)
+    if kind is VERB_FORMS:
+        forms = []
+        for encoded in value:
+            verb_form = VerbForm._decode(encoded[1:])
+            verb_form.form = _intern(encoded[0])
+            forms.append(verb_form)
+        return tuple(forms)
+    if kind is RESULT_GROUPS:
+        return tuple(ResultGroup(_intern(header), tuple(Result._decode(result) for result in results))
+                     for header, results in value)
+    if type(kind) is tuple:
+        return tuple(kind[0]._decode(item) for item in value)
+    return kind._decode(value)
+
+
+def from_info(info):
+    """ Entry of Word.info(), None stays None """
+    return None if info is None else Entry.from_dict(info)
+
+
+def encode(entry):
+    """ entry as nested tuples of str, int and None, to be written with marshal """
+    return entry._encode()
+
+
+def decode(encoded):
+    """ Entry of encode(entry) """
+    return Entry._decode(encoded)
+
+
+def dumps(entry):
+    """ bytes of entry """
+    return MAGIC + marshal.dumps(encode(entry))
+
+
+def loads(data):
+    """ Entry of dumps(entry) """
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError('not an entry')
+    return decode(marshal.loads(data[len(MAGIC):]))
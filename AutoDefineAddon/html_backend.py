@@ -0,0 +1,135 @@
+""" html parser backend the scrapers build their trees with
+
+bs4 has builders for html.parser, lxml and html5lib, but only html.parser is
+always there: the others need packages the Anki Python may not have. A backend
+that is not installed falls back to html.parser. tests/benchmark_backends.py
+tells which installed backend is the fastest that gives the same entries.
+A backend is only used if it builds the same tree as html.parser for
+SELF_CHECK_PAGE, a snippet with the characters and entities of the dictionaries.
+
+Elements with a title in prune_titles are left out of the tree with everything
+inside them: html.parser and lxml never build them, html5lib builds its tree on
+its own so they are removed once it is built.
+"""
+
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+
+DEFAULT = 'html.parser'
+BACKENDS = ('html.parser', 'lxml', 'html5lib')
+# Oxford and Laban serve utf-8, html5lib would guess windows-1252 for pages without a charset
+DEFAULT_ENCODING = 'utf-8'
+SELF_CHECK_PAGE = ('<html><head><title>t</title></head><body><div id="entryContent">'
+                   '<span class="phon" title="phonetics">/ˈhæp.i/</span> <p>rất&nbsp;vui &amp; h&agrave;i l&ograve;ng'
+                   '<br>it&#8217;s &#x41;<!-- c --><b>a</b></p></div></body></html>').encode(DEFAULT_ENCODING)
+
+_name = DEFAULT
+
+
+def available():
+    """ installed backends of BACKENDS """
+    return [backend for backend in BACKENDS if builder_registry.lookup(backend) is not None]
+
+
+def configure(backend):
+    """ build trees with backend, html.parser if it is unknown, not installed or fails the self check
+
+    Return: the backend in use
+    """
+    global _name
+    _name = backend if backend in available() and _passes_self_check(backend) else DEFAULT
+    return _name
+
+
+def _passes_self_check(backend):
+    """ True if backend builds the same entry content of SELF_CHECK_PAGE as html.parser """
+    global _name
+    (previous, _name) = (_name, DEFAULT)
+    try:
+        expected = _nodes(parse(SELF_CHECK_PAGE))
+        _name = backend
+        return _nodes(parse(SELF_CHECK_PAGE)) == expected
+    finally:
+        _name = previous
+
+
+def _nodes(soup_data):
+    content = soup_data.find(id='entryContent')
+    if content is None:
+        return None
+    return [(node.name, node.attrs) if node.name else (type(node).__name__, str(node)) for node in content.descendants]
+
+
+def name():
+    return _name
+
+
+def parse(markup, parse_only=None, prune_titles=frozenset(), encoding=DEFAULT_ENCODING):
+    """ BeautifulSoup of markup built with the configured backend
+
+    prune_titles - titles of the elements to leave out with their descendants
+    encoding - encoding of markup given as bytes, e.g. the encoding of the response
+    """
+    # bs4 warns when it is given an encoding for markup that is already decoded
+    from_encoding = encoding if isinstance(markup, bytes) else None
+    if _name == 'html5lib':
+        # html5lib always builds the whole page and warns about parse_only
+        soup_data = BeautifulSoup(markup, _name, from_encoding=from_encoding)
+        for tag in soup_data.find_all(title=lambda title: title in prune_titles):
+            tag.decompose()
+        return soup_data
+    if not prune_titles:
+        return BeautifulSoup(markup, _name, parse_only=parse_only, from_encoding=from_encoding)
+    return _PruningSoup(markup, _name, parse_only=parse_only, prune_titles=prune_titles,
+                        from_encoding=from_encoding)
+
+
+class _PruningSoup(BeautifulSoup):
+    """ BeautifulSoup that does not build the elements with a title in prune_titles
+
+    The tags opened inside a pruned element are kept on a stack of names only, and
+    closed like the builder closes real tags: an end tag closes the latest open tag
+    of its name and everything opened after it. The element ends when its own tag
+    is closed, or when an end tag closes one of its ancestors.
+    """
+
+    def __init__(self, markup, features, parse_only=None, prune_titles=frozenset(), from_encoding=None):
+        self.prune_titles = prune_titles
+        super().__init__(markup, features, parse_only=parse_only, from_encoding=from_encoding)
+
+    def reset(self):
+        super().reset()
+        self.pruned = []
+
+    def handle_starttag(self, name, namespace, nsprefix, attrs, sourceline=None, sourcepos=None, namespaces=None):
+        if not self.pruned:
+            if attrs.get('title') not in self.prune_titles:
+                return super().handle_starttag(name, namespace, nsprefix, attrs, sourceline=sourceline,
+                                               sourcepos=sourcepos, namespaces=namespaces)
+            self.endData()
+        # void elements are closed as soon as they are opened
+        if not self.builder.can_be_empty_element(name):
+            self.pruned.append(name)
+        return None
+
+    def handle_endtag(self, name, nsprefix=None):
+        if self.pruned:
+            if name in self.pruned:
+                while self.pruned.pop() != name:
+                    pass
+                return
+            if not self.open_tag_counter.get(name):
+                return
+            # the end tag of an ancestor closes the pruned element too
+            self.pruned = []
+        super().handle_endtag(name, nsprefix)
+
+    def handle_data(self, data):
+        if not self.pruned:
+            super().handle_data(data)
+
+    def endData(self, containerClass=None):
+        if self.pruned:
+            self.current_data = []
+            return
+        super().endData(containerClass)
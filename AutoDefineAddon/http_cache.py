@@ -0,0 +1,273 @@
+""" persistent http response cache with revalidation
+
+Layout of the cache directory:
+    meta/<sha1 of url>.json - url, final url, ETag, Last-Modified, store time and body hash
+    bodies/<sha256 of body> - response bodies, content-addressed so identical pages are stored once
+
+A fresh entry (younger than ttl) is served without any network access, a stale
+one is revalidated with a conditional GET and reused on 304 Not Modified.
+Only 200 responses are stored.
+
+The cache is pruned on the first store and every PRUNE_INTERVAL stores after it:
+entries stored (or revalidated) more than max_age ago are dropped, then the
+oldest ones until the bodies take at most max_bytes. The bodies of dropped
+entries go with them, other bodies no entry refers to once ORPHAN_GRACE passed.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from . import atomic_file, http_client
+
+DEFAULT_TTL = 7 * 24 * 60 * 60
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+PRUNE_INTERVAL = 200
+# a body is written before the entry referring to it, younger orphans may still get one
+ORPHAN_GRACE = 60 * 60
+
+_lock = threading.Lock()
+_pruning = threading.Lock()
+_directory = None
+_ttl = DEFAULT_TTL
+_max_age = DEFAULT_MAX_AGE
+_max_bytes = DEFAULT_MAX_BYTES
+_stores_until_prune = 0
+_stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'bytes_saved': 0}
+
+
+class CachedResponse(object):
+    """ response rebuilt from the cache, has the attributes the scrapers use """
+
+    def __init__(self, url, content, headers):
+        self.url = url
+        self.content = content
+        self.headers = headers
+        self.status_code = 200
+        self.from_cache = True
+
+
+def configure(directory, ttl=DEFAULT_TTL, max_age=DEFAULT_MAX_AGE, max_bytes=DEFAULT_MAX_BYTES):
+    """ directory - where to keep the cache, None disables caching
+    ttl - seconds a stored response is used without revalidation
+    max_age - seconds after which a response that was not revalidated is dropped, 0 to keep it
+    max_bytes - size the stored bodies are pruned to, 0 for no limit
+    """
+    global _directory, _ttl, _max_age, _max_bytes, _stores_until_prune
+    with _lock:
+        _directory = directory
+        _ttl = ttl
+        _max_age = max_age
+        _max_bytes = max_bytes
+        _stores_until_prune = 0
+
+
+def _meta_path(directory, url):
+    return os.path.join(directory, 'meta', hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+
+def _body_path(directory, body_hash):
+    return os.path.join(directory, 'bodies', body_hash)
+
+
+def _load(directory, url):
+    """ return (meta, body) of url, or (None, None) if not cached """
+    try:
+        with open(_meta_path(directory, url), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(_body_path(directory, meta['body']), 'rb') as f:
+            body = f.read()
+    except (OSError, ValueError, KeyError):
+        return None, None
+    return meta, body
+
+
+def _store(directory, url, response):
+    body_hash = hashlib.sha256(response.content).hexdigest()
+    body_path = _body_path(directory, body_hash)
+    if not os.path.exists(body_path):
+        atomic_file.write(body_path, response.content)
+
+    meta = {
+        'url': url,
+        'final_url': response.url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'content_type': response.headers.get('Content-Type'),
+        'stored_at': time.time(),
+        'body': body_hash,
+        'size': len(response.content)
+    }
+    atomic_file.write(_meta_path(directory, url), json.dumps(meta).encode('utf-8'))
+
+
+def _touch(directory, url, meta):
+    meta['stored_at'] = time.time()
+    atomic_file.write(_meta_path(directory, url), json.dumps(meta).encode('utf-8'))
+
+
+def _cached_response(meta, body):
+    headers = {}
+    if meta.get('content_type'):
+        headers['Content-Type'] = meta['content_type']
+    return CachedResponse(meta.get('final_url') or meta['url'], body, headers)
+
+
+def _count(name, value=1):
+    with _lock:
+        _stats[name] += value
+
+
+def get(url, headers=None, timeout=None):
+    """ GET url through the cache, falls back to a plain request when caching is disabled """
+    with _lock:
+        directory, ttl = _directory, _ttl
+    if directory is None:
+        return http_client.get(url, headers=headers, timeout=timeout)
+
+    meta, body = _load(directory, url)
+    if meta is not None and time.time() - meta['stored_at'] < ttl:
+        _count('hits')
+        _count('bytes_saved', len(body))
+        return _cached_response(meta, body)
+
+    request_headers = dict(headers or {})
+    if meta is not None:
+        if meta.get('etag'):
+            request_headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            request_headers['If-Modified-Since'] = meta['last_modified']
+
+    response = http_client.get(url, headers=request_headers, timeout=timeout)
+
+    if response.status_code == 304 and meta is not None:
+        _count('revalidated')
+        _count('bytes_saved', len(body))
+        _touch(directory, url, meta)
+        return _cached_response(meta, body)
+
+    _count('misses')
+    if response.status_code == 200:
+        _store(directory, url, response)
+        if _prune_due():
+            prune()
+    return response
+
+
+def _prune_due():
+    global _stores_until_prune
+    with _lock:
+        _stores_until_prune -= 1
+        if _stores_until_prune > 0:
+            return False
+        _stores_until_prune = PRUNE_INTERVAL
+        return True
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def prune():
+    """ drop expired entries, then the least recently stored ones while the bodies take more than max_bytes,
+    and remove the bodies no entry refers to
+
+    Return: number of entries dropped
+    """
+    with _lock:
+        directory, max_age, max_bytes = _directory, _max_age, _max_bytes
+    if directory is None or not _pruning.acquire(blocking=False):
+        return 0
+    try:
+        return _prune(directory, max_age, max_bytes)
+    finally:
+        _pruning.release()
+
+
+def _prune(directory, max_age, max_bytes):
+    now = time.time()
+    entries = []
+    for path in _listdir(os.path.join(directory, 'meta')):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            entries.append((meta['stored_at'], path, meta['body']))
+        except (OSError, ValueError, KeyError, TypeError):
+            if not path.endswith('.tmp') or _age(path, now) > ORPHAN_GRACE:
+                _remove(path)
+    entries.sort()
+
+    bodies = {}
+    for path in _listdir(os.path.join(directory, 'bodies')):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        bodies[os.path.basename(path)] = (stat.st_size, stat.st_mtime)
+
+    references = {}
+    for _, _, body_hash in entries:
+        references[body_hash] = references.get(body_hash, 0) + 1
+    size = sum(bodies[body_hash][0] for body_hash in references if body_hash in bodies)
+
+    dropped = 0
+    for stored_at, path, body_hash in entries:
+        expired = max_age > 0 and now - stored_at > max_age
+        if not expired and (max_bytes <= 0 or size <= max_bytes):
+            break
+        _remove(path)
+        dropped += 1
+        references[body_hash] -= 1
+        if references[body_hash] == 0:
+            del references[body_hash]
+            size -= bodies.pop(body_hash, (0, 0))[0]
+            _remove(_body_path(directory, body_hash))
+
+    # bodies no entry referred to when listed may still get theirs
+    for name, (_, modified_at) in bodies.items():
+        if name not in references and now - modified_at > ORPHAN_GRACE:
+            _remove(_body_path(directory, name))
+    return dropped
+
+
+def _listdir(path):
+    try:
+        return [os.path.join(path, name) for name in os.listdir(path)]
+    except OSError:
+        return []
+
+
+def _age(path, now):
+    try:
+        return now - os.path.getmtime(path)
+    except OSError:
+        return 0
+
+
+def stats():
+    """ Return: {'hits': <served without network>, 'revalidated': <304 responses>,
+    'misses': <full downloads>, 'bytes_saved': <body bytes not downloaded>} """
+    with _lock:
+        return dict(_stats)
+
+
+def clear():
+    """ remove every stored response """
+    with _lock:
+        directory = _directory
+    if directory is None:
+        return
+    for sub_directory in ('meta', 'bodies'):
+        path = os.path.join(directory, sub_directory)
+        if os.path.isdir(path):
+            for name in os.listdir(path):
+                try:
+                    os.remove(os.path.join(path, name))
+                except OSError:
+                    pass
@@ -0,0 +1,276 @@
+""" shared pooled http client for oxford, laban and audio downloads """
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from http import cookiejar
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .throttle import TokenBucket, CircuitBreaker, RateLimitedError, retry_after_seconds, backoff_delay
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_REQUESTS_PER_SECOND = 5
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN = 60
+# longest wait before a retry, whatever Retry-After the server sends
+MAX_RETRY_DELAY = 30
+# seconds one get() may spend waiting for the rate limiter and retries
+DEFAULT_DEADLINE = 60
+# seconds a fail-fast get() may wait for the rate limiter, it never retries
+FAIL_FAST_DEADLINE = 2
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class BlockAll(cookiejar.CookiePolicy):
+    """ policy to block cookies """
+    return_ok = set_ok = domain_return_ok = path_return_ok = lambda self, *args, **kwargs: False
+    netscape = True
+    rfc2965 = hide_cookie2 = False
+
+
+_lock = threading.Lock()
+_session = None
+_pool_connections = DEFAULT_POOL_CONNECTIONS
+_pool_maxsize = DEFAULT_POOL_MAXSIZE
+_requests_by_host = {}
+_requests_per_second = DEFAULT_REQUESTS_PER_SECOND
+_max_retries = DEFAULT_MAX_RETRIES
+_breaker_threshold = DEFAULT_BREAKER_THRESHOLD
+_breaker_cooldown = DEFAULT_BREAKER_COOLDOWN
+_limiters = {}
+_breakers = {}
+_retries = 0
+# set inside fail_fast() and count_requests(), copied into the threads started by io_pool and the audio downloader
+_fail_fast = contextvars.ContextVar('fail_fast', default=False)
+_request_counter = contextvars.ContextVar('request_counter', default=None)
+
+
+class RequestCounter(object):
+    """ number of requests sent inside a count_requests() block """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self):
+        with self._lock:
+            self.count += 1
+
+
+def configure(pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE):
+    """ set pool sizes, the session is rebuilt on next request if they changed
+
+    pool_connections - number of hosts to keep a connection pool for
+    pool_maxsize - number of keep-alive connections kept per host
+    """
+    global _pool_connections, _pool_maxsize
+    with _lock:
+        if (pool_connections, pool_maxsize) == (_pool_connections, _pool_maxsize):
+            return
+        _pool_connections = pool_connections
+        _pool_maxsize = pool_maxsize
+        _close_session()
+
+
+def configure_throttling(requests_per_second=DEFAULT_REQUESTS_PER_SECOND, max_retries=DEFAULT_MAX_RETRIES,
+                         breaker_threshold=DEFAULT_BREAKER_THRESHOLD, breaker_cooldown=DEFAULT_BREAKER_COOLDOWN):
+    """ requests_per_second - average request rate allowed per host, 0 for unlimited
+    max_retries - retries of a request failing with 429, 5xx or a connection error
+    breaker_threshold - consecutive failures after which a host is paused, 0 to never pause
+    breaker_cooldown - seconds a paused host is left alone before it is tried again
+    """
+    global _requests_per_second, _max_retries, _breaker_threshold, _breaker_cooldown
+    with _lock:
+        _requests_per_second = requests_per_second
+        _max_retries = max_retries
+        _breaker_threshold = breaker_threshold
+        _breaker_cooldown = breaker_cooldown
+        _limiters.clear()
+        _breakers.clear()
+
+
+def _throttling(host):
+    """ (rate limiter, circuit breaker) of host, must hold _lock """
+    if host not in _limiters:
+        _limiters[host] = TokenBucket(_requests_per_second)
+        _breakers[host] = CircuitBreaker(host, _breaker_threshold, _breaker_cooldown)
+    return _limiters[host], _breakers[host]
+
+
+def _create_session():
+    session = requests.Session()
+    session.cookies.set_policy(BlockAll())
+    # block=False: when every pooled connection is busy an extra one is opened
+    # and simply not returned to the pool, so callers never wait on the pool itself
+    adapter = HTTPAdapter(pool_connections=_pool_connections, pool_maxsize=_pool_maxsize, pool_block=False)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _close_session():
+    global _session
+    if _session is not None:
+        _session.close()
+        _session = None
+
+
+def session():
+    """ return the long-lived session, created on first use """
+    global _session
+    with _lock:
+        if _session is None:
+            _session = _create_session()
+        return _session
+
+
+@contextmanager
+def fail_fast():
+    """ requests sent inside the block are not retried and do not wait out a Retry-After pause,
+    for lookups the user is waiting for on the main thread """
+    token = _fail_fast.set(True)
+    try:
+        yield
+    finally:
+        _fail_fast.reset(token)
+
+
+@contextmanager
+def count_requests():
+    """ yield a RequestCounter of the requests sent inside the block, including retries
+    and requests of the threads it starts through io_pool """
+    counter = RequestCounter()
+    token = _request_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _request_counter.reset(token)
+
+
+def get(url, headers=None, timeout=None, deadline=DEFAULT_DEADLINE, **kwargs):
+    """ GET url through the shared connection pools
+
+    Requests are rate limited per host. 429, 5xx and connection errors are retried
+    after the Retry-After delay (at most MAX_RETRY_DELAY) or a jittered exponential backoff,
+    the last response (or error) is returned (raised) once retries are exhausted.
+    No retry is started that would end more than deadline seconds after the call.
+    Raise CircuitOpenError while the host is paused after repeated failures, and RateLimitedError
+    when the host asks to wait (Retry-After) and the request gives up instead.
+    """
+    global _retries
+    host = urlsplit(url).netloc
+    with _lock:
+        (limiter, breaker) = _throttling(host)
+        max_retries = _max_retries
+    if _fail_fast.get():
+        max_retries = 0
+        deadline = min(deadline, FAIL_FAST_DEADLINE)
+    deadline_at = time.monotonic() + deadline
+
+    attempt = 0
+    while True:
+        breaker.before_request()
+        wait = limiter.acquire(deadline_at)
+        if wait is not None:
+            raise RateLimitedError(host, wait)
+        with _lock:
+            _requests_by_host[host] = _requests_by_host.get(host, 0) + 1
+        if _request_counter.get() is not None:
+            _request_counter.get().add()
+
+        try:
+            response = session().get(url, headers=headers, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            breaker.record_failure()
+            delay = min(backoff_delay(attempt), MAX_RETRY_DELAY)
+            if attempt >= max_retries or time.monotonic() + delay > deadline_at:
+                raise
+        except requests.RequestException:
+            # not worth a retry, but a half-open breaker must still learn its probe failed
+            breaker.record_failure()
+            raise
+        else:
+            if response.status_code not in RETRY_STATUS_CODES:
+                breaker.record_success()
+                return response
+
+            breaker.record_failure()
+            retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                retry_after = min(retry_after, MAX_RETRY_DELAY)
+                # the server asked every client of this host to slow down, not only this request
+                limiter.pause(retry_after)
+                delay = retry_after
+            else:
+                delay = min(backoff_delay(attempt), MAX_RETRY_DELAY)
+            if attempt >= max_retries or time.monotonic() + delay > deadline_at:
+                if retry_after is None:
+                    return response
+                response.close()
+                raise RateLimitedError(host, retry_after)
+            if retry_after is not None:
+                # waited out by limiter.acquire()
+                delay = 0
+            response.close()
+
+        with _lock:
+            _retries += 1
+        attempt += 1
+        time.sleep(delay)
+
+
+def stats():
+    """ connection reuse counters
+
+    Return: {
+            'requests': <requests sent>,
+            'connections': <tcp/tls connections opened>,
+            'reused': <requests served over an already open connection>,
+            'retries': <requests sent again after 429, 5xx or a connection error>,
+            'hosts': {<host>: {'requests': ..., 'connections': ..., 'reused': ..., 'paused': ...}, ...}
+            }
+    """
+    with _lock:
+        requests_by_host = dict(_requests_by_host)
+        breakers = dict(_breakers)
+        retries = _retries
+        session = _session
+
+    connections_by_host = {}
+    if session is not None:
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    connections_by_host[pool.host] = connections_by_host.get(pool.host, 0) + pool.num_connections
+
+    hosts = {}
+    for host, count in requests_by_host.items():
+        connections = connections_by_host.get(urlsplit('//' + host).hostname, 0)
+        hosts[host] = {'requests': count, 'connections': connections, 'reused': max(count - connections, 0),
+                       'paused': host in breakers and breakers[host].is_open}
+
+    total_requests = sum(host['requests'] for host in hosts.values())
+    total_connections = sum(host['connections'] for host in hosts.values())
+    return {
+        'requests': total_requests,
+        'connections': total_connections,
+        'reused': max(total_requests - total_connections, 0),
+        'retries': retries,
+        'hosts': hosts
+    }
+
+
+def close():
+    """ close all pooled connections, e.g. when the profile is closed """
+    with _lock:
+        _close_session()
+        _requests_by_host.clear()
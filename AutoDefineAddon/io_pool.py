@@ -0,0 +1,42 @@
+""" shared thread pool for blocking fetches issued from inside one lookup
+
+Tasks submitted here must be leaves: they may block on the network but must
+never wait for other tasks of this pool, otherwise a full pool deadlocks.
+"""
+
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_WORKERS = 8
+
+_lock = threading.Lock()
+_executor = None
+_max_workers = DEFAULT_MAX_WORKERS
+
+
+def configure(max_workers=DEFAULT_MAX_WORKERS):
+    """ max_workers - number of fetches allowed to run at once """
+    global _max_workers
+    with _lock:
+        _max_workers = max(1, max_workers)
+
+
+def submit(func, *args, **kwargs):
+    """ run func(*args, **kwargs) in the pool, in a copy of the caller's context (e.g. http_client.fail_fast()),
+    return its concurrent.futures.Future """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix='AutoDefineFetch')
+        executor = _executor
+    return executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+def shutdown():
+    """ stop the pool threads, a new pool is started by the next submit """
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
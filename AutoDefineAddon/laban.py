@@ -1,17 +1,93 @@
-import requests
-from http import cookiejar
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+from bs4.element import Tag
+
+from . import css_selectors, html_backend, http_cache
+
+# definitions and idioms are only read from the dictionary tabs, the rest of the page is never built
+PAGE_REGIONS = SoupStrainer(class_='slide_content')
+
+CONTENT_SELECTOR = '.slide_content:not(.hidden) #content_selectable'
+WORDFORM_CLASS = 'bg-grey bold font-large m-top20'
+IDIOM_CLASS = 'bold dot-blue m-top15'
+
+css_selectors.register(CONTENT_SELECTOR)
+
+
+def sweep_entry(content_div, definitions, idioms):
+    """Append the wordforms and idioms of an entry to definitions and idioms.
+
+    The children of the entry are visited once, left to right: a wordform or idiom
+    header opens a new group, the following definitions and examples are added to
+    it and a translation is taken together with the example it follows.
+    """
+    elements = [element for element in content_div.children if isinstance(element, Tag)]
+    wordform = None
+    idiom = None
+    definition = None
+
+    def close_definition(group):
+        if group is not None and definition is not None and definition['description']:
+            group['definitions'].append(definition)
+
+    index = 0
+    while index < len(elements):
+        element = elements[index]
+        index += 1
+        classes = element.get('class', [])
+        class_string = ' '.join(classes)
+
+        if element.name == 'div' and class_string == WORDFORM_CLASS:
+            close_definition(idiom if idiom is not None else wordform)
+            idiom = definition = None
+            wordform = {'wordform': element.get_text(strip=True), 'definitions': []}
+            definitions.append(wordform)
+            continue
+
+        if element.name == 'div' and class_string == IDIOM_CLASS:
+            close_definition(idiom if idiom is not None else wordform)
+            definition = None
+            idiom = {'name': element.get_text(strip=True), 'definitions': []}
+            idioms.append(idiom)
+            continue
+
+        group = idiom if idiom is not None else wordform
+        if group is None or element.name != 'div':
+            if idiom is not None:
+                close_definition(idiom)
+                idiom = definition = None
+            continue
+
+        if 'bold' in classes and ('grey' if group is idiom else 'green') in classes:
+            close_definition(group)
+            definition = {'description': element.get_text(strip=True), 'examples': []}
+        elif 'color-light-blue' in classes:
+            if definition is None:
+                definition = {'description': "", 'examples': []}
+            translation_text = ""
+            if index < len(elements) and is_translation(elements[index]):
+                translation_text = elements[index].get_text(strip=True)
+                index += 1
+            definition['examples'].append({'example': ' '.join(element.stripped_strings),
+                                            'translation': translation_text})
+        elif group is idiom:
+            # anything else ends the idiom, the element may still belong to the wordform
+            close_definition(idiom)
+            idiom = definition = None
+            index -= 1
+
+    close_definition(idiom if idiom is not None else wordform)
+
+
+def is_translation(element):
+    classes = element.get('class', [])
+    return element.name == 'div' and 'margin25' in classes and not (
+        'bold' in classes or 'color-light-blue' in classes)
+
 
 class WordNotFound(Exception):
     """Exception raised when a word is not found in the dictionary (404 status code)."""
     pass
 
-class BlockAll(cookiejar.CookiePolicy):
-    """Policy to block cookies."""
-    return_ok = set_ok = domain_return_ok = path_return_ok = lambda self, *args, **kwargs: False
-    netscape = True
-    rfc2965 = hide_cookie2 = False
-
 class Word:
     """Retrieve word info from the Laban dictionary website."""
     BASE_URL = 'https://dict.laban.vn/find?type=1&query='
@@ -20,10 +96,12 @@ class Word:
                       'Chrome/118.0.0.0 Safari/537.36'
     }
 
-    def __init__(self, word, headers=HEADERS):
+    def __init__(self, word, headers=HEADERS, timeout=None, full_page=False):
         self.word = word
         self.soup_data = None
         self.HEADERS = headers
+        self.timeout = timeout
+        self.full_page = full_page
 
     def get_url(self):
         """Get the URL of the word definition."""
@@ -31,98 +109,40 @@ class Word:
 
     def fetch_word_data(self):
         """Fetch the HTML soup of the word."""
-        session = requests.Session()
-        session.cookies.set_policy(BlockAll())
-        
-        response = session.get(self.get_url(), headers=self.HEADERS)
+        response = http_cache.get(self.get_url(), headers=self.HEADERS, timeout=self.timeout)
         if response.status_code == 404:
             raise WordNotFound(f"Word '{self.word}' not found in the dictionary.")
-        self.soup_data = BeautifulSoup(response.content, 'html.parser')
+        if response.status_code != 200:
+            response.raise_for_status()
+        self.load(response.content)
+
+    def load(self, page_content):
+        """Parse downloaded html of the word page, only PAGE_REGIONS unless full_page is set."""
+        self.soup_data = html_backend.parse(page_content, parse_only=None if self.full_page else PAGE_REGIONS)
 
     def parse_definitions(self):
         """Parse and return word definitions."""
-        if not self.soup_data:
-            return []
-
-        content_divs = self.soup_data.select('.slide_content:not(.hidden) #content_selectable')
-        definitions = []
-
-        for content_div in content_divs:
-            wordform_divs = content_div.find_all('div', {'class': 'bg-grey bold font-large m-top20'})
-            for wordform_div in wordform_divs:
-                wordform = wordform_div.get_text(strip=True)
-                definition_elements = wordform_div.find_next_siblings('div', limit=20)  # Increased limit to capture more siblings
-                
-                word_definitions = []
-                current_definition = {'description': "", 'examples': []}
-                for element in definition_elements:
-                    if 'green' in element.get('class', []) and 'bold' in element.get('class', []):
-                        if current_definition['description']:
-                            word_definitions.append(current_definition)
-                        current_definition = {'description': element.get_text(strip=True), 'examples': []}
-                    elif 'color-light-blue' in element.get('class', []):
-                        example_text = ' '.join(element.stripped_strings)
-                        translation_element = element.find_next_sibling('div', {'class': 'margin25'})
-                        translation_text = translation_element.get_text(strip=True) if translation_element else ""
-                        current_definition['examples'].append({'example': example_text, 'translation': translation_text})
-                
-                if current_definition['description']:
-                    word_definitions.append(current_definition)
-                
-                definitions.append({
-                    'wordform': wordform,
-                    'definitions': word_definitions
-                })
-        
-        return definitions
+        return self.parse()['definitions']
 
     def parse_idioms(self):
         """Parse and return idioms."""
-        if not self.soup_data:
-            return []
-        
-        content_divs = self.soup_data.select('.slide_content:not(.hidden) #content_selectable')
-
-        idioms = []
-        for content_div in content_divs:
-            idiom_elements = content_div.find_all('div', {'class': 'bold dot-blue m-top15'})
-            for idiom_element in idiom_elements:
-                idiom_text = idiom_element.get_text(strip=True)
-                current_element = idiom_element
-
-                idiom_definitions = []
-                current_definition = {'description': "", 'examples': []}
-
-                while current_element := current_element.find_next_sibling():
-                    if 'grey' in current_element.get('class', []) and 'bold' in current_element.get('class', []):
-                        if current_definition['description']:
-                            idiom_definitions.append(current_definition)
-                        current_definition = {'description': current_element.get_text(strip=True), 'examples': []}
-                    elif 'color-light-blue' in current_element.get('class', []):
-                        example_text = ' '.join(current_element.stripped_strings)
-                        translation_element = current_element.find_next_sibling('div', {'class': 'margin25'})
-                        translation_text = translation_element.get_text(strip=True) if translation_element else ""
-                        current_definition['examples'].append({'example': example_text, 'translation': translation_text})
-                    else:
-                        break
-                
-                if current_definition['description']:
-                    idiom_definitions.append(current_definition)
-
-                idioms.append({
-                    'name': idiom_text,
-                    'definitions': idiom_definitions
-                })
-
-        return idioms
+        return self.parse()['idioms']
 
     def get_info(self):
         """Return all info about a word."""
         self.fetch_word_data()
+        return self.parse()
 
+    def parse(self):
+        """Return definitions and idioms of the loaded page, read in one sweep over each entry."""
+        definitions = []
+        idioms = []
+        if self.soup_data:
+            for content_div in css_selectors.select(self.soup_data, CONTENT_SELECTOR):
+                sweep_entry(content_div, definitions, idioms)
         return {
-            'definitions': self.parse_definitions(),
-            'idioms': self.parse_idioms()
+            'definitions': definitions,
+            'idioms': idioms
         }
 
 '''
@@ -0,0 +1,91 @@
+""" in-memory index of the file names in collection.media
+
+The folder is listed once, on first lookup, and the index is kept up to date as
+the add-on saves new files, so a file that is not there is found with a set
+lookup instead of a stat call on a possibly slow or network disk. A file the
+index has is checked on disk before it is reported, so one the user deleted
+from collection.media is downloaded again. Files added by Anki while the
+profile is open are not seen until the next reset().
+"""
+
+import os
+import threading
+
+_lock = threading.Lock()
+_directory = None
+_names = None
+_stats = {'lookups': 0, 'hits': 0, 'scanned': 0}
+
+
+def configure(directory):
+    """ directory - the collection.media folder, the index is reloaded if it changed """
+    global _directory, _names
+    with _lock:
+        if directory == _directory:
+            return
+        _directory = directory
+        _names = None
+
+
+def reset():
+    """ forget the folder and its file names, e.g. when the profile is closed """
+    global _directory, _names
+    with _lock:
+        _directory = None
+        _names = None
+
+
+def directory():
+    with _lock:
+        return _directory
+
+
+def path(name):
+    """ full path of file name in the indexed folder, None if no folder is indexed (no profile is open) """
+    with _lock:
+        if _directory is None:
+            return None
+        return os.path.join(_directory, name)
+
+
+def _load():
+    """ must hold _lock """
+    global _names
+    if _names is not None:
+        return
+    try:
+        with os.scandir(_directory) as entries:
+            _names = set(entry.name for entry in entries)
+    except FileNotFoundError:
+        _names = set()
+    _stats['scanned'] += len(_names)
+
+
+def contains(name):
+    """ True if file name is in the indexed folder """
+    with _lock:
+        if _directory is None:
+            return False
+        _load()
+        _stats['lookups'] += 1
+        if name not in _names:
+            return False
+        if not os.path.exists(os.path.join(_directory, name)):
+            # deleted by the user since the folder was listed
+            _names.discard(name)
+            return False
+        _stats['hits'] += 1
+        return True
+
+
+def add(name):
+    """ record that file name was saved to the indexed folder """
+    with _lock:
+        if _names is not None:
+            _names.add(name)
+
+
+def stats():
+    """ Return: {'lookups': <existence checks>, 'hits': <files found>, 'scanned': <names read from the folder>} """
+    with _lock:
+        return dict(_stats)
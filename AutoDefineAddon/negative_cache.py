@@ -0,0 +1,173 @@
+""" persistent cache of words a dictionary does not know
+
+Misses are kept in a small sqlite database with their own ttl, so a bulk re-run
+does not pay a network round trip for every misspelled word again. An optional
+in-memory Bloom filter of the stored keys sits in front of the database: most
+lookups are for words that are not misses at all and are answered without
+touching the disk.
+
+The database is opened on first use, so after close() (the profile was closed)
+the next lookup simply opens it again.
+"""
+
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_TTL = 24 * 60 * 60
+
+
+class BloomFilter(object):
+    """ set membership with false positives but no false negatives """
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.count = 0
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        self.count += 1
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+_lock = threading.Lock()
+_path = None
+_connection = None
+_ttl = DEFAULT_TTL
+_bloom = None
+_use_bloom = True
+_stats = {'hits': 0, 'misses': 0, 'bloom_skips': 0}
+
+
+def configure(path, ttl=DEFAULT_TTL, use_bloom=True):
+    """ path - sqlite database file, None disables the cache
+    ttl - seconds a miss is remembered
+    use_bloom - keep a Bloom filter of the stored misses in memory
+    """
+    global _path, _ttl, _use_bloom
+    with _lock:
+        _close()
+        _path = path
+        _ttl = ttl
+        _use_bloom = use_bloom
+
+
+def _open():
+    """ return the connection, opened on first use, None if the cache is disabled, must hold _lock """
+    global _connection
+    if _connection is None and _path is not None:
+        os.makedirs(os.path.dirname(_path), exist_ok=True)
+        _connection = sqlite3.connect(_path, check_same_thread=False)
+        _connection.execute('CREATE TABLE IF NOT EXISTS misses ('
+                            'source TEXT NOT NULL, query TEXT NOT NULL, stored_at REAL NOT NULL, '
+                            'PRIMARY KEY (source, query))')
+        _connection.execute('DELETE FROM misses WHERE stored_at < ?', (time.time() - _ttl,))
+        _connection.commit()
+        _rebuild_bloom()
+    return _connection
+
+
+def _rebuild_bloom():
+    """ must hold _lock """
+    global _bloom
+    if not _use_bloom:
+        _bloom = None
+        return
+    keys = [_bloom_key(source, query) for (source, query) in _connection.execute('SELECT source, query FROM misses')]
+    # leave room to grow, the filter is rebuilt once it is full
+    _bloom = BloomFilter(capacity=max(1000, 2 * len(keys)))
+    for key in keys:
+        _bloom.add(key)
+
+
+def _normalize(query):
+    # 'ice cream' typed in a note and 'ice-cream' sent to the search page are the same word
+    return re.sub(r"[\s-]+", "-", query.strip().lower())
+
+
+def _bloom_key(source, query):
+    return source + ':' + query
+
+
+def contains(source, query):
+    """ True if source ('oxford', 'laban') recently reported query as not found """
+    query = _normalize(query)
+    with _lock:
+        connection = _open()
+        if connection is None:
+            return False
+        if _bloom is not None and _bloom_key(source, query) not in _bloom:
+            _stats['bloom_skips'] += 1
+            return False
+        row = connection.execute('SELECT stored_at FROM misses WHERE source = ? AND query = ?',
+                                 (source, query)).fetchone()
+        if row is None or time.time() - row[0] >= _ttl:
+            _stats['misses'] += 1
+            return False
+        _stats['hits'] += 1
+        return True
+
+
+def add(source, query):
+    """ remember that source does not know query """
+    query = _normalize(query)
+    with _lock:
+        connection = _open()
+        if connection is None:
+            return
+        connection.execute('INSERT OR REPLACE INTO misses (source, query, stored_at) VALUES (?, ?, ?)',
+                           (source, query, time.time()))
+        connection.commit()
+        if _bloom is not None:
+            _bloom.add(_bloom_key(source, query))
+            if _bloom.count > _bloom.capacity:
+                _rebuild_bloom()
+
+
+def purge(query):
+    """ forget query for every source, e.g. after the user edited the word """
+    with _lock:
+        connection = _open()
+        if connection is None:
+            return
+        connection.execute('DELETE FROM misses WHERE query = ?', (_normalize(query),))
+        connection.commit()
+
+
+def stats():
+    """ Return: {'hits': <lookups answered as not found>, 'misses': <lookups that went to the dictionary>,
+    'bloom_skips': <lookups answered by the Bloom filter alone>} """
+    with _lock:
+        return dict(_stats)
+
+
+def close():
+    """ close the database, e.g. when the profile is closed, it is opened again by the next lookup """
+    with _lock:
+        _close()
+
+
+def _close():
+    """ must hold _lock """
+    global _connection, _bloom
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+    _bloom = None
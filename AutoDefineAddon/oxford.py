@@ -33,10 +33,29 @@
 
 """ oxford dictionary api """
 
-from http import cookiejar
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
 
-import requests
-from bs4 import BeautifulSoup as soup
+from bs4 import SoupStrainer
+from bs4.dammit import UnicodeDammit, EntitySubstitution
+from bs4.element import Tag, NavigableString, CData
+
+from . import css_selectors, html_backend, http_cache
+
+# bump whenever the output of Word.info() or Word.idioms() changes,
+# entries cached by an older parser are then dropped
+PARSER_VERSION = 1
+
+
+# the only parts of a page that are read, the header, ads, scripts and footer are never built
+PAGE_REGIONS = SoupStrainer(id=['entryContent', 'rightcolumn'])
+
+# boxes that are never built, to prevent false positive results (British/American: edge case 'phone')
+PRUNED_TITLES = frozenset(['Oxford Collocations Dictionary', 'British/American', 'Express Yourself', 'Collocations',
+                           'Word Origin'])
+
+# sections of Word.info() a caller may leave out, id, name, wordform, property and other_results are always read
+SECTIONS = frozenset(['pronunciations', 'definitions', 'idioms', 'verb_forms', 'phrasal_verbs', 'references'])
 
 
 class WordNotFound(Exception):
@@ -44,13 +63,6 @@ class WordNotFound(Exception):
     pass
 
 
-class BlockAll(cookiejar.CookiePolicy):
-    """ policy to block cookies """
-    return_ok = set_ok = domain_return_ok = path_return_ok = lambda self, *args, **kwargs: False
-    netscape = True
-    rfc2965 = hide_cookie2 = False
-
-
 class Word(object):
     """ retrive word info from oxford dictionary website """
     entry_selector = '#entryContent > .entry'
@@ -81,7 +93,15 @@ class Word(object):
 
     other_results_selector = '#rightcolumn #relatedentries'
 
-    soup_data = None
+    def __init__(self, page_content, full_page=False):
+        """ parse downloaded html of a word page, each instance owns its tree
+        so several pages can be parsed at once from different threads
+
+        full_page - build the whole page instead of PAGE_REGIONS only
+        """
+        self.soup_data = None
+        self._infos = {}
+        self.load(page_content, full_page)
 
     @classmethod
     def get_url(cls, word, is_search):
@@ -92,48 +112,45 @@ class Word(object):
             baseurl = 'https://www.oxfordlearnersdictionaries.com/definition/english/'
         return baseurl + word
 
-    @classmethod
-    def delete(cls, selector):
-        """ remove tag with specified selector in cls.soup_data """
-        try:
-            for tag in cls.soup_data.select(selector):
-                tag.decompose()
-        except IndexError:
-            pass
-
     @classmethod
     def get(cls, word, headers, is_search):
         """ get html soup of word """
-        req = requests.Session()
-        req.cookies.set_policy(BlockAll())
+        return cls(cls.fetch(word, headers, is_search))
 
-        page_html = req.get(cls.get_url(word, is_search), headers=headers)
+    @classmethod
+    def fetch(cls, word, headers, is_search, timeout=None):
+        """ download html of word page without parsing it """
+        page_html = http_cache.get(cls.get_url(word, is_search), headers=headers, timeout=timeout)
         if page_html.status_code == 404:
             raise WordNotFound
-        else:
-            cls.soup_data = soup(page_html.content, 'html.parser')
-
-        if cls.soup_data is not None:
-            # remove some unnecessary tags to prevent false positive results
-            cls.delete('[title="Oxford Collocations Dictionary"]')
-            cls.delete('[title="British/American"]')  # edge case: 'phone'
-            cls.delete('[title="Express Yourself"]')
-            cls.delete('[title="Collocations"]')
-            cls.delete('[title="Word Origin"]')
-
-    @classmethod
-    def verb_forms(cls):
+        if page_html.status_code != 200:
+            page_html.raise_for_status()
+        return page_html.content
+
+    def load(self, page_content, full_page=False):
+        """ parse downloaded html into self.soup_data, without the PRUNED_TITLES boxes """
+        self.soup_data = html_backend.parse(page_content, parse_only=None if full_page else PAGE_REGIONS,
+                                            prune_titles=PRUNED_TITLES)
+
+    def close(self):
+        """ free the parsed tree right away instead of waiting for the garbage collector,
+        the tree links parents and children so it is only reclaimed by a full collection """
+        if self.soup_data is not None:
+            self.soup_data.decompose()
+            self.soup_data = None
+
+    def verb_forms(self):
         """ return verb forms for irregular verbs """
-        if cls.soup_data is None:
+        if self.soup_data is None:
             return None
         try:
             result = {}
-            for verb_form in cls.soup_data.select(cls.verb_forms_selector):
+            for verb_form in css_selectors.select(self.soup_data, self.verb_forms_selector):
                 form = verb_form.attrs['form']
 
-                value = verb_form.select(cls.verb_forms_selector_td)[0]
+                value = css_selectors.select(verb_form, self.verb_forms_selector_td)[0]
 
-                span_tag = value.select('span.vf_prefix')[0]
+                span_tag = css_selectors.select(value, 'span.vf_prefix')[0]
                 prefix = span_tag.text
                 span_tag.replace_with('')
 
@@ -143,8 +160,7 @@ class Word(object):
         except IndexError:
             return None
 
-    @classmethod
-    def other_results(cls):
+    def other_results(self):
         """ get similar words, idioms, phrases...
 
         Return: {
@@ -164,28 +180,28 @@ class Word(object):
         info = []
 
         try:
-            rightcolumn_tags = cls.soup_data.select(cls.other_results_selector)[0]
+            rightcolumn_tags = css_selectors.select(self.soup_data, self.other_results_selector)[0]
         except IndexError:
             return None
 
         # there can be multiple other results table like All matches, Phrasal verbs, Idioms,...
-        header_tags = rightcolumn_tags.select('dt')
-        other_results_tags = rightcolumn_tags.select('dd')
+        header_tags = css_selectors.select(rightcolumn_tags, 'dt')
+        other_results_tags = css_selectors.select(rightcolumn_tags, 'dd')
 
         # loop each other result table
         for header_tag, other_results_tag in zip(header_tags, other_results_tags):
             header = header_tag.text
             other_results = []
 
-            for item_tag in other_results_tag.select('li'):
-                names = item_tag.select('span')[0].find_all(text=True, recursive=False)
-                wordform_tag = item_tag.select('pos')
+            for item_tag in css_selectors.select(other_results_tag, 'li'):
+                names = css_selectors.select(item_tag, 'span')[0].find_all(text=True, recursive=False)
+                wordform_tag = css_selectors.select(item_tag, 'pos')
                 names.append(wordform_tag[0].text if len(wordform_tag) > 0 else '')
                 other_results.append(names)
 
             other_results = list(filter(None, other_results))  # remove empty list
-            ids = [cls.extract_id(tag.attrs['href'])
-                   for tag in other_results_tag.select('li a')]
+            ids = [self.extract_id(tag.attrs['href'])
+                   for tag in css_selectors.select(other_results_tag, 'li a')]
 
             results = []
             for other_result, id in zip(other_results, ids):
@@ -204,45 +220,41 @@ class Word(object):
 
         return info
 
-    @classmethod
-    def name(cls):
+    def name(self):
         """ get word name """
-        if cls.soup_data is None:
+        if self.soup_data is None:
             return None
 
-        name = cls.soup_data.select(cls.title_selector)[0]
-        for span_tag in name.select('span'):
+        name = css_selectors.select(self.soup_data, self.title_selector)[0]
+        for span_tag in css_selectors.select(name, 'span'):
             span_tag.replace_with('')
         return name.text.strip()
 
-    @classmethod
-    def id(cls):
+    def id(self):
         """ get id of a word. if a word has definitions in 2 seperate pages
         (multiple wordform) it will return 'word_1' and 'word_2' depend on
         which page it's on """
-        if cls.soup_data is None:
+        if self.soup_data is None:
             return None
-        return cls.soup_data.select(cls.entry_selector)[0].attrs['id']
+        return css_selectors.select(self.soup_data, self.entry_selector)[0].attrs['id']
 
-    @classmethod
-    def wordform(cls):
+    def wordform(self):
         """ return wordform of word (verb, noun, adj...) """
-        if cls.soup_data is None:
+        if self.soup_data is None:
             return None
 
         try:
-            return cls.soup_data.select(cls.wordform_selector)[0].text
+            return css_selectors.select(self.soup_data, self.wordform_selector)[0].text
         except IndexError:
             return None
 
-    @classmethod
-    def property_global(cls):
+    def property_global(self):
         """ return global property (apply to all definitions) """
-        if cls.soup_data is None:
+        if self.soup_data is None:
             return None
 
         try:
-            return cls.soup_data.select(cls.property_global_selector)[0].text
+            return css_selectors.select(self.soup_data, self.property_global_selector)[0].text
         except IndexError:
             return None
 
@@ -257,18 +269,17 @@ class Word(object):
 
         return None
 
-    @classmethod
-    def pronunciations(cls):
+    def pronunciations(self):
         """ get britain and america pronunciations """
-        if cls.soup_data is None:
+        if self.soup_data is None:
             return None
 
         britain = {'prefix': None, 'ipa': None, 'ogg': None, 'mp3': None}
         america = {'prefix': None, 'ipa': None, 'ogg': None, 'mp3': None}
 
         try:
-            britain_pron_tag = cls.soup_data.select(cls.br_pronounce_selector)[0]
-            america_pron_tag = cls.soup_data.select(cls.am_pronounce_selector)[0]
+            britain_pron_tag = css_selectors.select(self.soup_data, self.br_pronounce_selector)[0]
+            america_pron_tag = css_selectors.select(self.soup_data, self.am_pronounce_selector)[0]
 
             britain['ipa'] = britain_pron_tag.text
             britain['prefix'] = 'BrE'
@@ -278,18 +289,22 @@ class Word(object):
             pass
 
         try:
-            britain['ogg'] = cls.soup_data.select(cls.br_pronounce_audio_ogg_selector)[0].attrs['data-src-ogg']
-            america['ogg'] = cls.soup_data.select(cls.am_pronounce_audio_ogg_selector)[0].attrs['data-src-ogg']
-            britain['mp3'] = cls.soup_data.select(cls.br_pronounce_audio_mp3_selector)[0].attrs['data-src-mp3']
-            america['mp3'] = cls.soup_data.select(cls.am_pronounce_audio_mp3_selector)[0].attrs['data-src-mp3']
+            britain['ogg'] = css_selectors.select(
+                self.soup_data, self.br_pronounce_audio_ogg_selector)[0].attrs['data-src-ogg']
+            america['ogg'] = css_selectors.select(
+                self.soup_data, self.am_pronounce_audio_ogg_selector)[0].attrs['data-src-ogg']
+            britain['mp3'] = css_selectors.select(
+                self.soup_data, self.br_pronounce_audio_mp3_selector)[0].attrs['data-src-mp3']
+            america['mp3'] = css_selectors.select(
+                self.soup_data, self.am_pronounce_audio_mp3_selector)[0].attrs['data-src-mp3']
         except IndexError:
             pass
 
         if britain['prefix'] is None and (britain['ogg'] or britain['mp3']):
-            britain['prefix'] = cls.get_prefix_from_filename(britain['ogg']) or cls.get_prefix_from_filename(britain['mp3'])
+            britain['prefix'] = self.get_prefix_from_filename(britain['ogg']) or self.get_prefix_from_filename(britain['mp3'])
 
         if america['prefix'] is None and (america['ogg'] or america['mp3']):
-            america['prefix'] = cls.get_prefix_from_filename(america['ogg']) or cls.get_prefix_from_filename(america['mp3'])
+            america['prefix'] = self.get_prefix_from_filename(america['ogg']) or self.get_prefix_from_filename(america['mp3'])
 
         return [britain, america]
 
@@ -301,66 +316,60 @@ class Word(object):
         """
         return link.split('/')[-1]
 
-    @classmethod
-    def get_references(cls, tags):
+    def get_references(self, tags):
         """ get info about references to other page
         Argument: soup.select(<selector>)
         Return: [{'id': <id>, 'name': <word>}, {'id': <id2>, 'name': <word2>}, ...]
         """
-        if cls.soup_data is None:
+        if self.soup_data is None:
             return None
 
         references = []
-        for tag in tags.select('.xrefs a'):  # see also <external link>
-            id = cls.extract_id(tag.attrs['href'])
+        for tag in css_selectors.select(tags, '.xrefs a'):  # see also <external link>
+            id = self.extract_id(tag.attrs['href'])
             word = tag.text
             references.append({'id': id, 'name': word})
 
         return references
 
-    @classmethod
-    def references(cls):
+    def references(self):
         """ get global references """
-        if cls.soup_data is None:
+        if self.soup_data is None:
             return None
 
-        header_tag = cls.soup_data.select(cls.header_selector)[0]
-        return cls.get_references(header_tag)
+        header_tag = css_selectors.select(self.soup_data, self.header_selector)[0]
+        return self.get_references(header_tag)
 
-    @classmethod
-    def definitions(cls, full=False):
+    def definitions(self, full=False):
         """ Return: list of definitions """
-        if cls.soup_data is None:
+        if self.soup_data is None:
             return None
 
         if not full:
-            return [tag.text for tag in cls.soup_data.select(cls.definitions_selector)]
-        return cls.definition_full()
+            return [tag.text for tag in css_selectors.select(self.soup_data, self.definitions_selector)]
+        return self.definition_full()
 
-    @classmethod
-    def examples(cls):
+    def examples(self):
         """ List of all examples (not categorized in seperate definitions) """
-        if cls.soup_data is None:
+        if self.soup_data is None:
             return None
-        return [tag.text for tag in cls.soup_data.select(cls.examples_selector)]
+        return [tag.text for tag in css_selectors.select(self.soup_data, self.examples_selector)]
 
-    @classmethod
-    def phrasal_verbs(cls):
+    def phrasal_verbs(self):
         """ get phrasal verbs list (verb only) """
-        if cls.soup_data is None:
+        if self.soup_data is None:
             return None
 
         phrasal_verbs = []
-        for tag in cls.soup_data.select(cls.phrasal_verbs_selector):
-            phrasal_verb = tag.select('.xh')[0].text
-            id = cls.extract_id(tag.attrs['href'])  # https://abc/definition/id -> id
+        for tag in css_selectors.select(self.soup_data, self.phrasal_verbs_selector):
+            phrasal_verb = css_selectors.select(tag, '.xh')[0].text
+            id = self.extract_id(tag.attrs['href'])  # https://abc/definition/id -> id
 
             phrasal_verbs.append({'name': phrasal_verb, 'id': id})
 
         return phrasal_verbs
 
-    @classmethod
-    def _parse_definition(cls, parent_tag):
+    def _parse_definition(self, parent_tag):
         """ return word definition + corresponding examples
 
         A word can have a single (None) or multiple namespaces
@@ -371,47 +380,46 @@ class Word(object):
         (transitive/intransitive/countable/uncountable/singular/plural...)
         A verb can have phrasal verbs
         """
-        if cls.soup_data is None:
+        if self.soup_data is None:
             return None
 
         definition = {}
 
         try:  # property (countable, transitive, plural,...)
-            definition['property'] = parent_tag.select('.grammar')[0].text
+            definition['property'] = css_selectors.select(parent_tag, '.grammar')[0].text
         except IndexError:
             pass
 
         try:  # label: (old-fashioned), (informal), (saying)...
-            definition['label'] = parent_tag.select('.labels')[0].text
+            definition['label'] = css_selectors.select(parent_tag, '.labels')[0].text
         except IndexError:
             pass
 
         try:  # refer to something (of people, of thing,...)
-            definition['refer'] = parent_tag.select('.dis-g')[0].text
+            definition['refer'] = css_selectors.select(parent_tag, '.dis-g')[0].text
         except IndexError:
             pass
 
-        definition['references'] = cls.get_references(parent_tag)
+        definition['references'] = self.get_references(parent_tag)
         if not definition['references']:
             definition.pop('references', None)
 
         try:  # sometimes, it just refers to other page without having a definition
-            definition['description'] = parent_tag.select('.def')[0].text
+            definition['description'] = css_selectors.select(parent_tag, '.def')[0].text
         except IndexError:
             pass
 
         definition['examples'] = [example_tag.text
-                                  for example_tag in parent_tag.select('.examples .x')]
+                                  for example_tag in css_selectors.select(parent_tag, '.examples .x')]
 
         definition['extra_example'] = [
             example_tag.text
-            for example_tag in parent_tag.select('[unbox=extra_examples] .examples .unx')
+            for example_tag in css_selectors.select(parent_tag, '[unbox=extra_examples] .examples .unx')
         ]
 
         return definition
 
-    @classmethod
-    def definition_full(cls):
+    def definition_full(self):
         """ return word definition + corresponding examples
 
         A word can have a single (None) or multiple namespaces
@@ -422,25 +430,25 @@ class Word(object):
         (transitive/intransitive/countable/uncountable/singular/plural...)
         A verb can have phrasal verbs
         """
-        if cls.soup_data is None:
+        if self.soup_data is None:
             return None
 
-        namespace_tags = cls.soup_data.select(cls.namespaces_selector)
+        namespace_tags = css_selectors.select(self.soup_data, self.namespaces_selector)
 
         info = []
         for namespace_tag in namespace_tags:
             try:
-                namespace = namespace_tag.select('h2.shcut')[0].text
+                namespace = css_selectors.select(namespace_tag, 'h2.shcut')[0].text
             except IndexError:
                 # some word have similar definitions grouped in a multiple namespaces (time)
                 # some do not, and only have one namespace (woman)
                 namespace = None
 
             definitions = []
-            definition_full_tags = namespace_tag.select('.sense')
+            definition_full_tags = css_selectors.select(namespace_tag, '.sense')
 
             for definition_full_tag in definition_full_tags:
-                definition = cls._parse_definition(definition_full_tag)
+                definition = self._parse_definition(definition_full_tag)
                 definitions.append(definition)
 
             info.append({'namespace': namespace, 'definitions': definitions})
@@ -448,31 +456,30 @@ class Word(object):
         # no namespace. all definitions is global
         if len(info) == 0:
             info.append({'namespace': '__GLOBAL__', 'definitions': []})
-            def_body_tags = cls.soup_data.select(cls.definition_body_selector)
+            def_body_tags = css_selectors.select(self.soup_data, self.definition_body_selector)
             if len(def_body_tags) == 0:
-                def_body_tags = cls.soup_data.select(cls.definition_body_selector_single)
+                def_body_tags = css_selectors.select(self.soup_data, self.definition_body_selector_single)
 
             definitions = []
             for def_body_tag in def_body_tags:
-                definition_full_tags = def_body_tag.select('.sense')
+                definition_full_tags = css_selectors.select(def_body_tag, '.sense')
 
                 for definition_full_tag in definition_full_tags:
-                    definition = cls._parse_definition(definition_full_tag)
+                    definition = self._parse_definition(definition_full_tag)
                     definitions.append(definition)
 
             info[0]['definitions'] = definitions
 
         return info
 
-    @classmethod
-    def idioms(cls):
+    def select_idioms(self):
         """ get word idioms
 
         Idioms dont have namespace like regular definitions
         Each idioms have one or more definitions
         Each definitions can have one, many or no examples
         """
-        idiom_tags = cls.soup_data.select(cls.idioms_selector)
+        idiom_tags = css_selectors.select(self.soup_data, self.idioms_selector)
 
         idioms = []
         for idiom_tag in idiom_tags:
@@ -480,72 +487,89 @@ class Word(object):
             try:
                 # sometimes idiom is in multiple idm classes inside
                 # one idm-l class instead of a single idm class
-                idiom = idiom_tag.select('.idm-l')[0].text
+                idiom = css_selectors.select(idiom_tag, '.idm-l')[0].text
             except IndexError:
-                idiom = idiom_tag.select('.idm')[0].text
+                idiom = css_selectors.select(idiom_tag, '.idm')[0].text
 
             global_definition = {}
 
             try:  # label: (old-fashioned), (informal), (saying)...
-                global_definition['label'] = idiom_tag.select('.labels')[0].text
+                global_definition['label'] = css_selectors.select(idiom_tag, '.labels')[0].text
             except IndexError:
                 pass
 
             try:  # refer to something (of people, of thing,...)
-                global_definition['refer'] = idiom_tag.select('.dis-g')[0].text
+                global_definition['refer'] = css_selectors.select(idiom_tag, '.dis-g')[0].text
             except IndexError:
                 pass
 
-            global_definition['references'] = cls.get_references(idiom_tag)
+            global_definition['references'] = self.get_references(idiom_tag)
             if not global_definition['references']:
                 global_definition.pop('references', None)
 
             definitions = []
             # one idiom can have multiple definitions, each can have multiple examples or no example
-            for definition_tag in idiom_tag.select('.sense'):
+            for definition_tag in css_selectors.select(idiom_tag, '.sense'):
                 definition = {}
 
                 try:  # sometimes, it just refers to other page without having a definition
-                    definition['description'] = definition_tag.select('.def')[0].text
+                    definition['description'] = css_selectors.select(definition_tag, '.def')[0].text
                 except IndexError:
                     pass
 
                 try:  # label: (old-fashioned), (informal), (saying)...
-                    definition['label'] = definition_tag.select('.labels')[0].text
+                    definition['label'] = css_selectors.select(definition_tag, '.labels')[0].text
                 except IndexError:
                     pass
 
                 try:  # refer to something (of people, of thing,...)
-                    definition['refer'] = definition_tag.select('.dis-g')[0].text
+                    definition['refer'] = css_selectors.select(definition_tag, '.dis-g')[0].text
                 except IndexError:
                     pass
 
-                definition['references'] = cls.get_references(definition_tag)
+                definition['references'] = self.get_references(definition_tag)
                 if not definition['references']:
                     definition.pop('references', None)
 
-                definition['examples'] = [example_tag.text for example_tag in definition_tag.select('.x')]
+                definition['examples'] = [example_tag.text
+                                          for example_tag in css_selectors.select(definition_tag, '.x')]
                 definitions.append(definition)
 
             idioms.append({'name': idiom, 'summary': global_definition, 'definitions': definitions})
 
         return idioms
 
-    @classmethod
-    def info(cls):
-        """ return all info about a word """
-        if cls.soup_data is None:
+    def info(self, sections=SECTIONS):
+        """ return all info about a word, extracted in a single walk over the entry
+
+        sections - parts of SECTIONS to extract, the others are not looked for
+        """
+        if self.soup_data is None:
+            return None
+        sections = frozenset(sections)
+        if sections not in self._infos:
+            self._infos[sections] = _TreeExtractor(self.soup_data, sections).info()
+        return self._infos[sections]
+
+    def idioms(self):
+        """ get word idioms, same as info()['idioms'] """
+        return self.info()['idioms']
+
+    def select_info(self):
+        """ info() built from one select() per field, the reference the single-pass extractor
+        is tested and benchmarked against. It changes the tree, so use it on a fresh Word """
+        if self.soup_data is None:
             return None
 
         word = {
-            'id': cls.id(),
-            'name': cls.name(),
-            'wordform': cls.wordform(),
-            'pronunciations': cls.pronunciations(),
-            'property': cls.property_global(),
-            'definitions': cls.definitions(full=True),
-            'idioms': cls.idioms(),
-            'other_results': cls.other_results()
+            'id': self.id(),
+            'name': self.name(),
+            'wordform': self.wordform(),
+            'pronunciations': self.pronunciations(),
+            'property': self.property_global(),
+            'definitions': self.definitions(full=True),
+            'idioms': self.select_idioms(),
+            'other_results': self.other_results()
         }
 
         if not word['property']:
@@ -555,12 +579,741 @@ class Word(object):
             word.pop('other_results', None)
 
         if word['wordform'] == 'verb':
-            word['phrasal_verbs'] = cls.phrasal_verbs()
-            word['verb_forms'] = cls.verb_forms()
+            word['phrasal_verbs'] = self.phrasal_verbs()
+            word['verb_forms'] = self.verb_forms()
 
         return word
 
 
+# compile the selectors of Word once, instead of on every select()
+css_selectors.register(
+    *[value for name, value in vars(Word).items() if name.endswith(('_selector', '_selector_td', '_selector_single'))],
+    '.def', '.dis-g', '.examples .x', '.grammar', '.idm', '.idm-l', '.labels', '.sense', '.x', '.xh', '.xrefs a',
+    '[unbox=extra_examples] .examples .unx', 'dd', 'dt', 'h2.shcut', 'li', 'li a', 'pos', 'span', 'span.vf_prefix')
+
+
+_TEXT_TYPES = (NavigableString, CData)
+
+
+def _text(tag, skip):
+    """ tag.text without the strings of the descendants for which skip(descendant) is True """
+    parts = []
+    for child in tag.children:
+        if isinstance(child, Tag):
+            if not skip(child):
+                parts.append(_text(child, skip))
+        elif type(child) in _TEXT_TYPES:
+            parts.append(child)
+    return ''.join(parts)
+
+
+class _Sense(object):
+    """ first .grammar/.labels/.dis-g/.def, references and examples found inside one .sense """
+    __slots__ = ('grammar', 'labels', 'dis', 'definition', 'references', 'examples', 'all_examples', 'extra_examples')
+
+    def __init__(self):
+        self.grammar = self.labels = self.dis = self.definition = None
+        self.references = []
+        self.examples = []
+        self.all_examples = []
+        self.extra_examples = []
+
+    def definition_dict(self):
+        """ same as Word._parse_definition() """
+        definition = {}
+        if self.grammar is not None:
+            definition['property'] = self.grammar.text
+        if self.labels is not None:
+            definition['label'] = self.labels.text
+        if self.dis is not None:
+            definition['refer'] = self.dis.text
+        if self.references:
+            definition['references'] = _references(self.references)
+        if self.definition is not None:
+            definition['description'] = self.definition.text
+        definition['examples'] = [tag.text for tag in self.examples]
+        definition['extra_example'] = [tag.text for tag in self.extra_examples]
+        return definition
+
+    def idiom_definition_dict(self):
+        """ same as a definition of Word.select_idioms() """
+        definition = {}
+        if self.definition is not None:
+            definition['description'] = self.definition.text
+        if self.labels is not None:
+            definition['label'] = self.labels.text
+        if self.dis is not None:
+            definition['refer'] = self.dis.text
+        if self.references:
+            definition['references'] = _references(self.references)
+        definition['examples'] = [tag.text for tag in self.all_examples]
+        return definition
+
+
+class _Idiom(object):
+    __slots__ = ('idm_l', 'idm', 'labels', 'dis', 'references', 'senses')
+
+    def __init__(self):
+        self.idm_l = self.idm = self.labels = self.dis = None
+        self.references = []
+        self.senses = []
+
+
+class _VerbForm(object):
+    __slots__ = ('form', 'value', 'prefix')
+
+    def __init__(self, form):
+        self.form = form
+        self.value = self.prefix = None
+
+
+class _Results(object):
+    """ one dd of #relatedentries """
+    __slots__ = ('items', 'links')
+
+    def __init__(self):
+        self.items = []
+        self.links = []
+
+
+class _ResultItem(object):
+    __slots__ = ('span', 'pos')
+
+    def __init__(self):
+        self.span = self.pos = None
+
+
+def _references(tags):
+    return [{'id': Word.extract_id(tag.attrs['href']), 'name': tag.text} for tag in tags]
+
+
+class _EntryMatcher(ABC):
+    """ matches the elements of a page against every field of Word.info() as they are opened
+
+    A driver calls start() for each element, in document order, and end() once its
+    children are done. The state of the ancestors (inside .top-container, [geo=br],
+    .examples, the enclosing .sense or idiom...) is kept in counters and stacks instead
+    of being looked up again by select(). Only #entryContent and #rightcolumn are matched.
+    Matched elements are kept as the node objects given by the driver, which must have
+    .attrs and .text and implement the text helpers below. Sections that are not in
+    sections are not matched at all.
+    """
+
+    def __init__(self, sections=SECTIONS):
+        self.sections = sections
+        self.entry_id = self.headword = self.wordform = self.grammar = None
+        self.phon = {'br': None, 'n_am': None}
+        self.audio = {}
+        self.namespaces = []
+        self.multiple_bodies = []
+        self.single_bodies = []
+        self.idioms = []
+        self.verb_forms = []
+        self.phrasal_verbs = []
+        self.related = None
+
+        # ancestor state of the element being opened
+        self.depth = {'top': 0, 'br': 0, 'n_am': 0, 'examples': 0, 'unbox': 0, 'extra_examples': 0,
+                      'xrefs': 0, 'phrasal': 0, 'li': 0}
+        self.senses = []
+        self.namespace_stack = []
+        self.bodies = []
+        self.idiom_stack = []
+        self.verb_form_stack = []
+        self.verb_value_stack = []
+        self.phrasal_stack = []
+        self.results_stack = []
+        self.item_stack = []
+        self.in_related = False
+        self.seen_entry_content = self.seen_rightcolumn = False
+        # (classes, in #entryContent, in #rightcolumn, is #entryContent, entered, pushed, opened related)
+        self.frames = [((), False, False, False, (), (), False)]
+
+    @abstractmethod
+    def text_without_spans(self, node):
+        """ text of node without the text of its span descendants """
+
+    @abstractmethod
+    def text_without(self, node, excluded):
+        """ text of node without the text of its descendant excluded """
+
+    @abstractmethod
+    def direct_strings(self, node):
+        """ strings that are direct children of node """
+
+    def start(self, node, name, attrs):
+        (parent_classes, in_entry, in_rightcolumn, parent_is_entry_content) = self.frames[-1][:4]
+        classes = attrs.get('class') or ()
+        element_id = attrs.get('id')
+        is_entry_content = False
+        if element_id == 'entryContent' and not self.seen_entry_content:
+            self.seen_entry_content = is_entry_content = True
+        opens_rightcolumn = element_id == 'rightcolumn' and not self.seen_rightcolumn
+        if opens_rightcolumn:
+            self.seen_rightcolumn = True
+
+        if not (in_entry or in_rightcolumn):
+            self.frames.append((classes, is_entry_content, opens_rightcolumn, is_entry_content, (), (), False))
+            return
+
+        depth = self.depth
+        entered = []
+        pushed = []
+
+        if parent_is_entry_content and self.entry_id is None and 'entry' in classes:
+            self.entry_id = attrs['id']
+
+        if depth['top']:
+            if self.headword is None and 'headword' in classes:
+                self.headword = node
+            if self.wordform is None and 'pos' in classes:
+                self.wordform = node
+            if self.grammar is None and 'grammar' in classes:
+                self.grammar = node
+
+        for geo in ('br', 'n_am'):
+            if depth[geo] and 'pronunciations' in self.sections:
+                if self.phon[geo] is None and 'phon' in classes:
+                    self.phon[geo] = node
+                for audio_format in ('ogg', 'mp3'):
+                    key = 'data-src-' + audio_format
+                    if key in attrs and (geo, audio_format) not in self.audio:
+                        self.audio[(geo, audio_format)] = attrs[key]
+
+        is_reference = name == 'a' and depth['xrefs'] and 'references' in self.sections
+        for sense in self.senses:
+            if sense.grammar is None and 'grammar' in classes:
+                sense.grammar = node
+            if sense.labels is None and 'labels' in classes:
+                sense.labels = node
+            if sense.dis is None and 'dis-g' in classes:
+                sense.dis = node
+            if sense.definition is None and 'def' in classes:
+                sense.definition = node
+            if is_reference:
+                sense.references.append(node)
+            if 'x' in classes:
+                sense.all_examples.append(node)
+                if depth['examples']:
+                    sense.examples.append(node)
+            if 'unx' in classes and depth['extra_examples']:
+                sense.extra_examples.append(node)
+
+        for namespace in self.namespace_stack:
+            if namespace['title'] is None and name == 'h2' and 'shcut' in classes:
+                namespace['title'] = node
+
+        for idiom in self.idiom_stack:
+            if idiom.idm_l is None and 'idm-l' in classes:
+                idiom.idm_l = node
+            if idiom.idm is None and 'idm' in classes:
+                idiom.idm = node
+            if idiom.labels is None and 'labels' in classes:
+                idiom.labels = node
+            if idiom.dis is None and 'dis-g' in classes:
+                idiom.dis = node
+            if is_reference:
+                idiom.references.append(node)
+
+        for verb_form in self.verb_form_stack:
+            if verb_form.value is None and name == 'td' and 'verb_form' in classes:
+                verb_form.value = node
+                self.verb_value_stack.append(verb_form)
+                pushed.append(self.verb_value_stack)
+        for verb_form in self.verb_value_stack:
+            if verb_form.prefix is None and verb_form.value is not node and name == 'span' and 'vf_prefix' in classes:
+                verb_form.prefix = node
+
+        for phrasal_verb in self.phrasal_stack:
+            if phrasal_verb['xh'] is None and 'xh' in classes:
+                phrasal_verb['xh'] = node
+
+        if self.in_related:
+            for results in self.results_stack:
+                if name == 'li':
+                    item = _ResultItem()
+                    results.items.append(item)
+                    self.item_stack.append(item)
+                    pushed.append(self.item_stack)
+                if name == 'a' and depth['li']:
+                    results.links.append(node)
+            for item in self.item_stack:
+                if item.span is None and name == 'span':
+                    item.span = node
+                if item.pos is None and name == 'pos':
+                    item.pos = node
+            if name == 'dt':
+                self.related[0].append(node)
+            elif name == 'dd':
+                results = _Results()
+                self.related[1].append(results)
+                self.results_stack.append(results)
+                pushed.append(self.results_stack)
+
+        # what this element starts for its descendants
+        sections = self.sections
+        if 'sense' in classes and ('definitions' in sections or self.idiom_stack):
+            sense = _Sense()
+            for namespace in self.namespace_stack:
+                namespace['senses'].append(sense)
+            for body in self.bodies:
+                body.append(sense)
+            for idiom in self.idiom_stack:
+                idiom.senses.append(sense)
+            self.senses.append(sense)
+            pushed.append(self.senses)
+        if 'shcut-g' in classes and 'senses_multiple' in parent_classes and 'definitions' in sections:
+            namespace = {'title': None, 'senses': []}
+            self.namespaces.append(namespace)
+            self.namespace_stack.append(namespace)
+            pushed.append(self.namespace_stack)
+        if ('senses_multiple' in classes or 'sense_single' in classes) and 'definitions' in sections:
+            body = []
+            (self.multiple_bodies if 'senses_multiple' in classes else self.single_bodies).append(body)
+            self.bodies.append(body)
+            pushed.append(self.bodies)
+        if 'idm-g' in classes and 'idioms' in parent_classes and 'idioms' in sections:
+            idiom = _Idiom()
+            self.idioms.append(idiom)
+            self.idiom_stack.append(idiom)
+            pushed.append(self.idiom_stack)
+        if name == 'tr' and 'verb_form' in classes and 'form' in attrs and 'verb_forms' in sections:
+            verb_form = _VerbForm(attrs['form'])
+            self.verb_forms.append(verb_form)
+            self.verb_form_stack.append(verb_form)
+            pushed.append(self.verb_form_stack)
+        if name == 'a' and depth['phrasal'] and 'phrasal_verbs' in sections:
+            phrasal_verb = {'href': attrs['href'], 'xh': None}
+            self.phrasal_verbs.append(phrasal_verb)
+            self.phrasal_stack.append(phrasal_verb)
+            pushed.append(self.phrasal_stack)
+
+        if 'top-container' in classes:
+            entered.append('top')
+        if attrs.get('geo') in ('br', 'n_am'):
+            entered.append(attrs['geo'])
+        if 'examples' in classes:
+            entered.append('examples')
+            if depth['unbox']:
+                entered.append('extra_examples')
+        if attrs.get('unbox') == 'extra_examples':
+            entered.append('unbox')
+        if 'xrefs' in classes:
+            entered.append('xrefs')
+        if 'phrasal_verb_links' in classes:
+            entered.append('phrasal')
+        if name == 'li':
+            entered.append('li')
+        for key in entered:
+            depth[key] += 1
+
+        opened_related = in_rightcolumn and self.related is None and element_id == 'relatedentries'
+        if opened_related:
+            self.related = ([], [])
+            self.in_related = True
+
+        self.frames.append((classes, in_entry or is_entry_content, in_rightcolumn or opens_rightcolumn,
+                            is_entry_content, entered, pushed, opened_related))
+
+    def end(self):
+        (_, _, _, _, entered, pushed, opened_related) = self.frames.pop()
+        if opened_related:
+            self.in_related = False
+        for key in entered:
+            self.depth[key] -= 1
+        for stack in pushed:
+            stack.pop()
+
+    def pronunciations(self):
+        """ same as Word.pronunciations() """
+        britain = {'prefix': None, 'ipa': None, 'ogg': None, 'mp3': None}
+        america = {'prefix': None, 'ipa': None, 'ogg': None, 'mp3': None}
+
+        if self.phon['br'] is not None and self.phon['n_am'] is not None:
+            britain['ipa'] = self.phon['br'].text
+            britain['prefix'] = 'BrE'
+            america['ipa'] = self.phon['n_am'].text
+            america['prefix'] = 'nAmE'
+
+        # like the selects of Word.pronunciations(), stop at the first missing one
+        for (pronunciation, geo, audio_format) in ((britain, 'br', 'ogg'), (america, 'n_am', 'ogg'),
+                                                   (britain, 'br', 'mp3'), (america, 'n_am', 'mp3')):
+            if (geo, audio_format) not in self.audio:
+                break
+            pronunciation[audio_format] = self.audio[(geo, audio_format)]
+
+        for pronunciation in (britain, america):
+            if pronunciation['prefix'] is None and (pronunciation['ogg'] or pronunciation['mp3']):
+                pronunciation['prefix'] = (Word.get_prefix_from_filename(pronunciation['ogg']) or
+                                           Word.get_prefix_from_filename(pronunciation['mp3']))
+
+        return [britain, america]
+
+    def definitions(self):
+        """ same as Word.definition_full() """
+        info = [{'namespace': namespace['title'].text if namespace['title'] is not None else None,
+                 'definitions': [sense.definition_dict() for sense in namespace['senses']]}
+                for namespace in self.namespaces]
+
+        if len(info) == 0:
+            bodies = self.multiple_bodies if len(self.multiple_bodies) > 0 else self.single_bodies
+            info.append({'namespace': '__GLOBAL__',
+                         'definitions': [sense.definition_dict() for body in bodies for sense in body]})
+        return info
+
+    def idioms_list(self):
+        """ same as Word.select_idioms() """
+        idioms = []
+        for idiom in self.idioms:
+            name_tag = idiom.idm_l if idiom.idm_l is not None else idiom.idm
+            if name_tag is None:
+                raise IndexError('idiom without name')
+
+            summary = {}
+            if idiom.labels is not None:
+                summary['label'] = idiom.labels.text
+            if idiom.dis is not None:
+                summary['refer'] = idiom.dis.text
+            if idiom.references:
+                summary['references'] = _references(idiom.references)
+
+            idioms.append({'name': name_tag.text, 'summary': summary,
+                           'definitions': [sense.idiom_definition_dict() for sense in idiom.senses]})
+        return idioms
+
+    def other_results(self):
+        """ same as Word.other_results() """
+        if self.related is None:
+            return None
+
+        info = []
+        (header_tags, results_list) = self.related
+        for header_tag, results in zip(header_tags, results_list):
+            other_results = []
+            for item in results.items:
+                if item.span is None:
+                    raise IndexError('other result without name')
+                names = self.direct_strings(item.span)
+                names.append(item.pos.text if item.pos is not None else '')
+                other_results.append(names)
+
+            ids = [Word.extract_id(tag.attrs['href']) for tag in results.links]
+
+            info.append({header_tag.text: [
+                {'name': ' '.join([name.strip() for name in other_result[0:-1]]), 'id': id,
+                 'wordform': other_result[-1].strip()}
+                for other_result, id in zip(other_results, ids)]})
+        return info
+
+    def phrasal_verbs_list(self):
+        """ same as Word.phrasal_verbs() """
+        phrasal_verbs = []
+        for phrasal_verb in self.phrasal_verbs:
+            if phrasal_verb['xh'] is None:
+                raise IndexError('phrasal verb without name')
+            phrasal_verbs.append({'name': phrasal_verb['xh'].text, 'id': Word.extract_id(phrasal_verb['href'])})
+        return phrasal_verbs
+
+    def verb_forms_dict(self):
+        """ same as Word.verb_forms() """
+        result = {}
+        for verb_form in self.verb_forms:
+            if verb_form.value is None or verb_form.prefix is None:
+                return None
+            value = self.text_without(verb_form.value, verb_form.prefix)
+            result[verb_form.form] = {'prefix': verb_form.prefix.text, 'value': value.strip()}
+        return result
+
+    def info(self):
+        """ same as Word.select_info() without the sections that are left out """
+        if self.entry_id is None or self.headword is None:
+            raise IndexError('page has no dictionary entry')
+
+        sections = self.sections
+        word = {
+            'id': self.entry_id,
+            'name': self.text_without_spans(self.headword).strip(),
+            'wordform': self.wordform.text if self.wordform is not None else None,
+            'pronunciations': self.pronunciations() if 'pronunciations' in sections else None,
+            'property': self.grammar.text if self.grammar is not None else None,
+            'definitions': self.definitions() if 'definitions' in sections else None,
+            'idioms': self.idioms_list() if 'idioms' in sections else None,
+            'other_results': self.other_results()
+        }
+
+        for section in ('pronunciations', 'definitions', 'idioms'):
+            if section not in sections:
+                word.pop(section)
+
+        if not word['property']:
+            word.pop('property', None)
+
+        if not word['other_results']:
+            word.pop('other_results', None)
+
+        if word['wordform'] == 'verb':
+            if 'phrasal_verbs' in sections:
+                word['phrasal_verbs'] = self.phrasal_verbs_list()
+            if 'verb_forms' in sections:
+                word['verb_forms'] = self.verb_forms_dict()
+
+        return word
+
+
+class _TreeExtractor(_EntryMatcher):
+    """ runs _EntryMatcher over a BeautifulSoup tree """
+
+    def __init__(self, soup_data, sections=SECTIONS):
+        super().__init__(sections)
+        self.visit(soup_data)
+
+    def visit(self, tag):
+        for child in tag.children:
+            if isinstance(child, Tag):
+                self.start(child, child.name, child.attrs)
+                self.visit(child)
+                self.end()
+
+    def text_without_spans(self, node):
+        return _text(node, lambda descendant: descendant.name == 'span')
+
+    def text_without(self, node, excluded):
+        return _text(node, lambda descendant: descendant is excluded)
+
+    def direct_strings(self, node):
+        return node.find_all(string=True, recursive=False)
+
+
+# same tree building rules as the html.parser builder of bs4
+_EMPTY_ELEMENT_TAGS = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link',
+                                 'menuitem', 'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound',
+                                 'command', 'frame', 'image', 'isindex', 'nextid', 'spacer'])
+_PRESERVE_WHITESPACE_TAGS = frozenset(['pre', 'textarea'])
+# strings inside these are not part of the text of their ancestors
+_STRING_CONTAINER_TAGS = frozenset(['rt', 'rp', 'style', 'script', 'template'])
+_ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+
+class _Node(object):
+    """ an open or closed element seen by _EventExtractor, its text is a slice of the page strings """
+    __slots__ = ('name', 'attrs', 'strings', 'start', 'end', 'span_depth')
+
+    def __init__(self, name, attrs, strings, span_depth):
+        self.name = name
+        self.attrs = attrs
+        self.strings = strings
+        self.start = len(strings.texts)
+        self.end = None
+        self.span_depth = span_depth
+
+    @property
+    def text(self):
+        return ''.join(self.strings.texts[self.start:self.end])
+
+
+class _Strings(object):
+    """ strings of the page regions in document order, with the element directly holding each one
+    and the number of spans around it
+
+    Comments, declarations and processing instructions are not part of the text of an element,
+    they are kept as '' in texts and their content in others by index.
+    """
+    __slots__ = ('texts', 'owners', 'span_depths', 'others')
+
+    def __init__(self):
+        self.texts = []
+        self.owners = []
+        self.span_depths = []
+        self.others = {}
+
+
+class _EventExtractor(_EntryMatcher, HTMLParser):
+    """ runs _EntryMatcher on html.parser events, no tree is built
+
+    Only the elements that are matched are kept, their text is read from the list
+    of strings of #entryContent and #rightcolumn. Tags are opened and closed like
+    the html.parser builder of bs4 does, so the result is the same as Word.info().
+    """
+
+    def __init__(self, original_encoding=None, sections=SECTIONS):
+        _EntryMatcher.__init__(self, sections)
+        HTMLParser.__init__(self, convert_charrefs=False)
+        self.original_encoding = original_encoding
+        self.strings = _Strings()
+        self.data = []
+        self.open = []
+        self.open_names = {}
+        self.already_closed_empty_element = []
+        self.span_depth = 0
+        self.pruned = 0
+        self.string_containers = 0
+        self.preserve_whitespace = 0
+
+    def flush(self, is_text=True):
+        """ end the current string, like BeautifulSoup.endData()
+
+        is_text - False for a comment, declaration or processing instruction
+        """
+        if not self.data:
+            return
+        text = ''.join(self.data)
+        self.data = []
+        if self.pruned or self.string_containers:
+            return
+        (_, in_entry, in_rightcolumn) = self.frames[-1][:3]
+        if not (in_entry or in_rightcolumn):
+            return
+        if not self.preserve_whitespace and text.strip(_ASCII_SPACES) == '':
+            text = '\n' if '\n' in text else ' '
+        if not is_text:
+            self.strings.others[len(self.strings.texts)] = text
+            text = ''
+        self.strings.texts.append(text)
+        self.strings.owners.append(self.open[-1] if self.open else None)
+        self.strings.span_depths.append(self.span_depth)
+
+    def handle_starttag(self, name, attrs, handle_empty_element=True):
+        self.flush()
+        attr_dict = {}
+        for key, value in attrs:
+            attr_dict[key] = '' if value is None else value
+        if 'class' in attr_dict:
+            attr_dict['class'] = attr_dict['class'].split()
+
+        node = _Node(name, attr_dict, self.strings, self.span_depth + (1 if name == 'span' else 0))
+        if self.pruned or attr_dict.get('title') in PRUNED_TITLES:
+            self.pruned += 1
+        else:
+            self.start(node, name, attr_dict)
+        self.open.append(node)
+        self.open_names[name] = self.open_names.get(name, 0) + 1
+        self.span_depth = node.span_depth
+        if name in _STRING_CONTAINER_TAGS:
+            self.string_containers += 1
+        if name in _PRESERVE_WHITESPACE_TAGS:
+            self.preserve_whitespace += 1
+
+        if name in _EMPTY_ELEMENT_TAGS and handle_empty_element:
+            self.handle_endtag(name, check_already_closed=False)
+            self.already_closed_empty_element.append(name)
+
+    def handle_startendtag(self, name, attrs):
+        self.handle_starttag(name, attrs, handle_empty_element=False)
+        self.handle_endtag(name)
+
+    def handle_endtag(self, name, check_already_closed=True):
+        self.flush()
+        if check_already_closed and name in self.already_closed_empty_element:
+            self.already_closed_empty_element.remove(name)
+            return
+        while self.open_names.get(name):
+            if self.pop().name == name:
+                break
+
+    def pop(self):
+        node = self.open.pop()
+        node.end = len(self.strings.texts)
+        self.open_names[node.name] -= 1
+        self.span_depth = self.open[-1].span_depth if self.open else 0
+        if node.name in _STRING_CONTAINER_TAGS:
+            self.string_containers -= 1
+        if node.name in _PRESERVE_WHITESPACE_TAGS:
+            self.preserve_whitespace -= 1
+        if self.pruned:
+            self.pruned -= 1
+        else:
+            self.end()
+        return node
+
+    def handle_data(self, data):
+        self.data.append(data)
+
+    def handle_charref(self, name):
+        """ same conversion as the html.parser builder of bs4 """
+        if name.startswith('x') or name.startswith('X'):
+            code = int(name[1:], 16)
+        else:
+            code = int(name)
+        data = None
+        if code < 256:
+            for encoding in (self.original_encoding, 'windows-1252'):
+                if not encoding:
+                    continue
+                try:
+                    data = bytearray([code]).decode(encoding)
+                except UnicodeDecodeError:
+                    pass
+        if not data:
+            try:
+                data = chr(code)
+            except (ValueError, OverflowError):
+                pass
+        self.handle_data(data or "\N{REPLACEMENT CHARACTER}")
+
+    def handle_entityref(self, name):
+        character = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self.handle_data(character if character is not None else "&%s" % name)
+
+    def handle_comment(self, data):
+        self.handle_string(data, is_text=False)
+
+    def handle_decl(self, data):
+        self.handle_string(data[len("DOCTYPE "):], is_text=False)
+
+    def unknown_decl(self, data):
+        # CData is text, any other declaration is not
+        if data.upper().startswith('CDATA['):
+            self.handle_string(data[len('CDATA['):])
+        else:
+            self.handle_string(data, is_text=False)
+
+    def handle_pi(self, data):
+        self.handle_string(data, is_text=False)
+
+    def handle_string(self, data, is_text=True):
+        """ data as a string of its own, like the html.parser builder adds comments and declarations """
+        self.flush()
+        self.data.append(data)
+        self.flush(is_text)
+
+    def close(self):
+        HTMLParser.close(self)
+        self.flush()
+        while self.open:
+            self.pop()
+
+    def text_without_spans(self, node):
+        strings = self.strings
+        return ''.join(strings.texts[i] for i in range(node.start, node.end)
+                       if strings.span_depths[i] == node.span_depth)
+
+    def text_without(self, node, excluded):
+        texts = self.strings.texts
+        return ''.join(texts[node.start:excluded.start] + texts[excluded.end:node.end])
+
+    def direct_strings(self, node):
+        strings = self.strings
+        return [strings.others.get(i, strings.texts[i]) for i in range(node.start, node.end)
+                if strings.owners[i] is node]
+
+
+def parse_events(page_content, sections=SECTIONS, encoding=html_backend.DEFAULT_ENCODING):
+    """ same as Word(page_content).info(sections), built from html.parser events without any tree
+
+    encoding - encoding of page_content given as bytes, tried first like html_backend.parse() does
+    """
+    if isinstance(page_content, bytes):
+        # decoded the way the html.parser builder decodes it for the tree
+        dammit = UnicodeDammit(page_content, known_definite_encodings=[encoding], is_html=True)
+        (markup, encoding) = (dammit.unicode_markup, dammit.original_encoding)
+    else:
+        (markup, encoding) = (page_content, None)
+    extractor = _EventExtractor(encoding, frozenset(sections))
+    extractor.feed(markup)
+    extractor.close()
+    return extractor.info()
+
+
 [{
     'All matches': [{'name': 'content', 'id': 'content2_1', 'wordform': 'adjective'}, {'name': 'content', 'id': 'content2_2', 'wordform': 'verb'}, {'name': 'content', 'id': 'contentment', 'wordform': ''}, {'name': 'content farm', 'id': 'content-farm', 'wordform': 'noun'}, {'name': 'content mill', 'id': 'content-mill', 'wordform': 'noun'}, {'name': 'content word', 'id': 'content-word', 'wordform': 'noun'}, {'name': 'content marketing', 'id': 'content-marketing', 'wordform': 'noun'}, {'name': 'content provider', 'id': 'content-provider', 'wordform': 'noun'}, {'name': 'content management system', 'id': 'content-management-system', 'wordform': 'noun'}, {'name': 'content farms', 'id': 'content-farm', 'wordform': ''}, {'name': 'content mill', 'id': 'content-farm', 'wordform': ''}, {'name': 'content mills', 'id': 'content-mill', 'wordform': ''}, {'name': 'content farm', 'id': 'content-mill', 'wordform': ''}, {'name': 'content providers', 'id': 'content-provider', 'wordform': ''}, {'name': 'user-generated content', 'id': 'ugc', 'wordform': ''}, {'name': 'content management system', 'id': 'cms', 'wordform': ''}, {'name': 'to your heart’s content', 'id': 'content2_3#heart_idmg_50', 'wordform': ''}]}, {'Idioms': [{'name': 'to your heart’s content', 'id': 'content2_3#heart_idmg_50', 'wordform': ''}]}
  ]
@@ -571,10 +1324,10 @@ HEADERS = {
     }
 try:
     word = 'love'
-    Word.get(word, HEADERS, True)
-    info = Word.info()
+    page = Word.get(word, HEADERS, True)
+    info = page.info()
     print(info)
-    idioms = Word.idioms()
+    idioms = page.idioms()
     print(idioms)
 except WordNotFound:
     print("Word not found in the dictionary.")
@@ -0,0 +1,102 @@
+""" speculative prefetch of the word being typed in the Add Cards editor
+
+Every change of the word restarts a short timer, when it fires the word is
+fetched in the background. Pressing the AutoDefine button then takes the
+running (or finished) fetch and waits for it instead of downloading the same
+pages again. A fetch for a word the user typed over, or left behind by
+closing the Add Cards window, is cancelled if it has not started yet and
+counted as wasted otherwise.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_DELAY = 0.8
+
+
+class SpeculativePrefetcher(object):
+    """ fetch - callable taking a word, run on a worker thread of the prefetcher
+    delay - seconds the word must stay unchanged before it is fetched
+    enabled - False to never prefetch, e.g. when there is no cache to fill
+    """
+
+    def __init__(self, fetch, delay=DEFAULT_DELAY, enabled=True):
+        self.fetch = fetch
+        self.delay = delay
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._executor = None
+        self._timer = None
+        self._word = None
+        self._future = None
+        self._stats = {'scheduled': 0, 'started': 0, 'used': 0, 'cancelled': 0, 'wasted': 0}
+
+    def schedule(self, word):
+        """ prefetch word once it has not changed for delay seconds """
+        if not self.enabled:
+            return
+        with self._lock:
+            if word == self._word:
+                return
+            self._discard()
+            self._word = word
+            if word == "":
+                return
+            self._stats['scheduled'] += 1
+            self._timer = threading.Timer(self.delay, self._start, args=(word,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _start(self, word):
+        with self._lock:
+            if word != self._word or self._future is not None:
+                return
+            self._timer = None
+            if self._executor is None:
+                # one worker: only the latest word is worth fetching
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='AutoDefinePrefetch')
+            self._stats['started'] += 1
+            self._future = self._executor.submit(self.fetch, word)
+
+    def _discard(self):
+        """ drop the pending or running prefetch, must hold _lock """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._future is not None:
+            if self._future.cancel():
+                self._stats['cancelled'] += 1
+            else:
+                self._stats['wasted'] += 1
+            self._future = None
+        self._word = None
+
+    def take(self, word):
+        """ return the Future of the prefetch of word and forget it, None if word was not prefetched """
+        with self._lock:
+            if word != self._word or self._future is None:
+                self._discard()
+                return None
+            future = self._future
+            self._future = None
+            self._word = None
+            self._stats['used'] += 1
+            return future
+
+    def cancel(self):
+        """ drop the pending or running prefetch, e.g. when the Add Cards window is closed """
+        with self._lock:
+            self._discard()
+
+    def stats(self):
+        """ Return: {'scheduled': <words waited for>, 'started': <fetches started>, 'used': <fetches taken by
+        the button>, 'cancelled': <fetches dropped before they started>, 'wasted': <fetches that ran for nothing>} """
+        with self._lock:
+            return dict(self._stats)
+
+    def shutdown(self):
+        with self._lock:
+            self._discard()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,102 @@
+""" idle-time pre-warm of the caches for words that are not defined yet
+
+A single low-priority thread looks the words up one after another, with a pause
+between words, and steps aside whenever the user is defining words in the
+editor or in bulk. It stops once it has used its request budget, so a large
+collection is warmed a bit more every session instead of all at once.
+"""
+
+import threading
+
+from . import http_client
+from .throttle import HostUnavailableError
+
+DEFAULT_REQUEST_BUDGET = 200
+DEFAULT_INTERVAL = 2.0
+
+
+class Prewarmer(object):
+    """ warm - callable taking a word, fills the caches for it
+    request_budget - requests the pre-warm may send before it stops, 0 for unlimited
+    interval - seconds to wait between two words
+    """
+
+    def __init__(self, warm, request_budget=DEFAULT_REQUEST_BUDGET, interval=DEFAULT_INTERVAL):
+        self.warm = warm
+        self.request_budget = request_budget
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {'queued': 0, 'warmed': 0, 'failed': 0, 'requests': 0}
+
+    def start(self, words):
+        """ warm words in the background, does nothing if a pre-warm is already running """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._stats['queued'] += len(words)
+            self._thread = threading.Thread(target=self._run, args=(list(words),),
+                                            name='AutoDefinePrewarm', daemon=True)
+            self._thread.start()
+
+    def _run(self, words):
+        for word in words:
+            # only use time the user is not waiting for
+            while not self._idle.wait(timeout=1):
+                if self._stop.is_set():
+                    return
+            if self._stop.is_set() or self._budget_left() <= 0:
+                return
+
+            # only its own requests, not those of a lookup the user starts meanwhile
+            with http_client.count_requests() as requests:
+                try:
+                    self.warm(word)
+                    self._count('warmed')
+                except HostUnavailableError:
+                    self._count('failed')
+                    return
+                except Exception:
+                    self._count('failed')
+                finally:
+                    self._count('requests', requests.count)
+
+            if self._stop.wait(timeout=self.interval):
+                return
+
+    def _budget_left(self):
+        if self.request_budget <= 0:
+            return 1
+        with self._lock:
+            return self.request_budget - self._stats['requests']
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self._stats[name] += value
+
+    def pause(self):
+        """ the user started defining words, wait until resume() is called as often as pause() """
+        with self._lock:
+            self._busy += 1
+            self._idle.clear()
+
+    def resume(self):
+        with self._lock:
+            self._busy = max(self._busy - 1, 0)
+            if self._busy == 0:
+                self._idle.set()
+
+    def stats(self):
+        """ Return: {'queued': <words given to start()>, 'warmed': <words looked up>, 'failed': <failed lookups>,
+        'requests': <requests sent while warming>} """
+        with self._lock:
+            return dict(self._stats)
+
+    def stop(self):
+        """ stop after the word being warmed, e.g. when the profile is closed """
+        self._stop.set()
@@ -0,0 +1,144 @@
+""" persistent index: search query -> oxford entry ids it resolved to
+
+Lets a word seen before skip the /search/english/?q= round trip and go straight
+to the /definition/english/<id> pages of its primary entry and of the
+same-headword sibling entries taken from "All matches".
+
+The index is an append-only file of json lines, {"query": ..., "primary": ...,
+"siblings": [...], "stored_at": ...}, later lines win and "primary": null
+removes a query. It is read once and compacted when it holds mostly stale lines,
+or a line that cannot be read, e.g. the last one was cut short by a crash.
+"""
+
+import json
+import os
+import threading
+import time
+
+from . import atomic_file
+
+DEFAULT_TTL = 30 * 24 * 60 * 60
+
+RECORD_KEYS = frozenset(['query', 'primary', 'siblings', 'stored_at'])
+
+_lock = threading.Lock()
+_path = None
+_ttl = DEFAULT_TTL
+_entries = None
+_stats = {'hits': 0, 'misses': 0}
+
+
+def configure(path, ttl=DEFAULT_TTL):
+    """ path - index file, None disables the index
+    ttl - seconds a resolution is trusted before searching again
+    """
+    global _path, _ttl, _entries
+    with _lock:
+        _path = path
+        _ttl = ttl
+        _entries = None
+
+
+def normalize(query):
+    """ the form of a query used as index key, same as the one sent to the search page """
+    return query.strip().replace(" ", "-").lower()
+
+
+def _read():
+    """ load the index file into memory, must hold _lock """
+    global _entries
+    _entries = {}
+    lines = 0
+    malformed = False
+    try:
+        with open(_path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                lines += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if not isinstance(record, dict) or 'query' not in record:
+                    malformed = True
+                    continue
+                if not line.endswith('\n'):
+                    malformed = True
+                if record.get('primary') is None:
+                    _entries.pop(record['query'], None)
+                elif RECORD_KEYS.issubset(record):
+                    _entries[record['query']] = record
+                else:
+                    malformed = True
+    except OSError:
+        return
+
+    # a line cut short is dropped, and appending after it would glue the next record to it
+    if malformed or lines > 2 * len(_entries) + 100:
+        _compact()
+
+
+def _compact():
+    """ rewrite the index file without stale lines, must hold _lock """
+    with atomic_file.replacing(_path, 'w', encoding='utf-8') as f:
+        for record in _entries.values():
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def _append(record):
+    """ must hold _lock """
+    os.makedirs(os.path.dirname(_path), exist_ok=True)
+    with open(_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def get(query):
+    """ Return: (<primary entry id>, [<sibling entry id>, ...]) or None if query is unknown """
+    key = normalize(query)
+    with _lock:
+        if _path is None:
+            return None
+        if _entries is None:
+            _read()
+        record = _entries.get(key)
+        if record is None or time.time() - record['stored_at'] >= _ttl:
+            _stats['misses'] += 1
+            return None
+        _stats['hits'] += 1
+        return record['primary'], list(record['siblings'])
+
+
+def put(query, primary, siblings):
+    """ remember that query resolved to primary entry id and sibling entry ids """
+    record = {'query': normalize(query), 'primary': primary, 'siblings': list(siblings), 'stored_at': time.time()}
+    with _lock:
+        if _path is None:
+            return
+        if _entries is None:
+            _read()
+        _entries[record['query']] = record
+        _append(record)
+
+
+def remove(query):
+    """ forget query, e.g. when one of its entries disappeared """
+    key = normalize(query)
+    with _lock:
+        if _path is None:
+            return
+        if _entries is None:
+            _read()
+        if _entries.pop(key, None) is not None:
+            _append({'query': key, 'primary': None})
+
+
+def close():
+    """ drop the index from memory, e.g. when the profile is closed, it is read again by the next lookup """
+    global _entries
+    with _lock:
+        _entries = None
+
+
+def stats():
+    """ Return: {'hits': <searches skipped>, 'misses': <queries that had to be searched>} """
+    with _lock:
+        return dict(_stats)
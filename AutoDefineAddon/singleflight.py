@@ -0,0 +1,72 @@
+""" single-flight: identical lookups running at the same time share one call
+
+While a call for a key is in flight, other callers asking for the same key wait
+for it and receive its result (or its exception) instead of starting their own
+network request and parse. The shared result must be treated as read-only.
+"""
+
+import threading
+
+
+class _Call(object):
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Group(object):
+    """ set of in-flight calls, keyed by anything hashable """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {'calls': 0, 'coalesced': 0}
+
+    def do(self, key, func, *args, **kwargs):
+        """ return func(*args, **kwargs), or the result of the identical call already in flight """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats['calls'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """ Return: {'calls': <calls actually made>, 'coalesced': <calls served by one already in flight>} """
+        with self._lock:
+            return dict(self._stats)
+
+
+_group = Group()
+
+
+def do(key, func, *args, **kwargs):
+    """ Group.do on the shared group """
+    return _group.do(key, func, *args, **kwargs)
+
+
+def stats():
+    """ Group.stats of the shared group """
+    return _group.stats()
@@ -0,0 +1,136 @@
+""" per-host request throttling: token bucket, retry backoff and circuit breaker """
+
+import email.utils
+import random
+import threading
+import time
+
+
+class HostUnavailableError(Exception):
+    """ requests to host are refused for longer than the caller may wait """
+
+    def __init__(self, host, retry_in, message):
+        self.host = host
+        self.retry_in = retry_in
+        super().__init__(message)
+
+
+class CircuitOpenError(HostUnavailableError):
+    """ host failed too many times in a row, requests are refused until the cooldown ends """
+
+    def __init__(self, host, retry_in):
+        super().__init__(host, retry_in, f"{host} is failing, requests paused for {int(retry_in) + 1} seconds")
+
+
+class RateLimitedError(HostUnavailableError):
+    """ host asked to wait (Retry-After) longer than the request may """
+
+    def __init__(self, host, retry_in):
+        super().__init__(host, retry_in, f"{host} asked to slow down, try again in {int(retry_in) + 1} seconds")
+
+
+class TokenBucket(object):
+    """ allows rate requests per second on average with bursts of up to capacity, rate 0 for unlimited """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds):
+        """ hand out no tokens for seconds, e.g. because of a Retry-After header """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self, deadline=None):
+        """ block until a request may be sent
+
+        deadline - time.monotonic() after which the request is not sent any more
+        Return: None once a token was taken, or the seconds still to wait if that would pass deadline
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until and self.rate <= 0:
+                    return None
+                if now >= self._paused_until:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return None
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    self._updated = self._paused_until
+                    wait = self._paused_until - now
+            if deadline is not None and now + wait > deadline:
+                return wait
+            time.sleep(wait)
+
+
+class CircuitBreaker(object):
+    """ opens after threshold consecutive failures, lets a single probe through after cooldown seconds
+    and closes again when the probe succeeds """
+
+    def __init__(self, host, threshold, cooldown):
+        self.host = host
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """ raise CircuitOpenError if the host should not be contacted now """
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            if self._opened_at is None:
+                return
+            retry_in = self._opened_at + self.cooldown - time.monotonic()
+            if retry_in > 0 or self._probing:
+                raise CircuitOpenError(self.host, max(retry_in, 0))
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or (self.threshold > 0 and self._failures >= self.threshold):
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None
+
+
+def retry_after_seconds(value):
+    """ seconds to wait according to a Retry-After header (delay or http date), None if absent or invalid """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date is None:
+        return None
+    return max(0.0, date.timestamp() - time.time())
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """ full-jitter exponential backoff before retry number attempt (0 based) """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,34 @@
+""" import modules of the add-on without Anki
+
+The package __init__ loads autodefine, which needs aqt. The package is registered
+by hand instead, so the scrapers and caches can be imported on their own.
+"""
+
+import importlib
+import sys
+import types
+from pathlib import Path
+
+ADDON_PATH = Path(__file__).parent.parent / 'AutoDefineAddon'
+FIXTURES_PATH = Path(__file__).parent / 'fixtures'
+PACKAGE = 'AutoDefineAddon'
+
+# (backend, '<source>/<page>') of the fixture pages a backend reads differently from html.parser on purpose:
+# html.parser drops the ';' of an unknown entity ('&unknownentity;'), lxml and html5lib keep it as html5 says
+KNOWN_BACKEND_DIFFERENCES = frozenset([('lxml', 'oxford/stride'), ('html5lib', 'oxford/stride')])
+
+
+def load(name):
+    """ return module AutoDefineAddon.<name> """
+    if PACKAGE not in sys.modules:
+        # the vendored bs4 is imported as a top-level package
+        sys.path.insert(0, str(ADDON_PATH))
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [str(ADDON_PATH)]
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(PACKAGE + '.' + name)
+
+
+def fixture_pages(source):
+    """ [(name, content), ...] of the saved pages in fixtures/<source> """
+    return [(path.stem, path.read_bytes()) for path in sorted((FIXTURES_PATH / source).glob('*.html'))]
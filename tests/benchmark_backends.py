@@ -0,0 +1,96 @@
+""" parse time of every installed html parser backend, and the one HTML_PARSER should be set to
+
+Same idea as bs4.diagnose.benchmark_parsers(), which times the backends on a random
+document, but the backends are also timed on the fixture pages and their entries are
+checked against the ones built with html.parser, the backend the parser tests run
+with. The fastest backend with the same entries, apart from the pages listed in
+KNOWN_BACKEND_DIFFERENCES, is recommended.
+
+run from the tests folder: python benchmark_backends.py [rounds]
+"""
+
+import sys
+import time
+
+from addon_modules import load, fixture_pages, KNOWN_BACKEND_DIFFERENCES
+
+oxford = load('oxford')
+laban = load('laban')
+html_backend = load('html_backend')
+
+from bs4 import __version__ as bs4_version, diagnose  # noqa: E402, the vendored bs4 is importable after load()
+
+
+def oxford_entry(page):
+    word = oxford.Word(page)
+    try:
+        return word.info()
+    finally:
+        word.close()
+
+
+def laban_entry(page):
+    word = laban.Word('')
+    word.load(page)
+    return word.parse()
+
+
+def entries(pages):
+    """ [(source, name, entry), ...] built with the configured backend """
+    return [(source, name, parse(page)) for source, parse, name, page in pages]
+
+
+def mismatches(backend, golden, built):
+    """ names of the pages whose entry is not the golden one, known differences of backend are left out """
+    return [f"{source}/{name}" for (source, name, expected), (_, _, entry) in zip(golden, built)
+            if entry != expected and (backend, f"{source}/{name}") not in KNOWN_BACKEND_DIFFERENCES]
+
+
+def measure(pages, rounds):
+    """ best of rounds, seconds per page to build and read the entries """
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        entries(pages)
+        elapsed = (time.perf_counter() - start) / len(pages)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure_random_document(data):
+    """ seconds to build the tree of a diagnose.rdoc() document """
+    start = time.perf_counter()
+    html_backend.parse(data)
+    return time.perf_counter() - start
+
+
+def main(rounds=5, num_elements=20000):
+    pages = ([('oxford', oxford_entry, name, page) for name, page in fixture_pages('oxford')] +
+             [('laban', laban_entry, name, page) for name, page in fixture_pages('laban')])
+    data = diagnose.rdoc(num_elements)
+
+    html_backend.configure(html_backend.DEFAULT)
+    golden = entries(pages)
+
+    print(f"Parser backends on Beautiful Soup {bs4_version}: {len(pages)} fixture pages (best of {rounds} rounds),"
+          f" random document of {len(data)} bytes")
+    passing = []
+    for backend in html_backend.BACKENDS:
+        if html_backend.configure(backend) != backend:
+            print(f"  {backend:<12} not installed")
+            continue
+        failed = mismatches(backend, golden, entries(pages))
+        seconds = measure(pages, rounds)
+        random_seconds = measure_random_document(data)
+        print(f"  {backend:<12} {seconds * 1000:7.2f} ms/page {1 / seconds:7.1f} pages/s"
+              f"  random document {random_seconds:6.2f} s"
+              f"  {'same entries' if not failed else 'different entries: ' + ', '.join(failed)}")
+        if not failed:
+            passing.append((seconds, backend))
+    html_backend.configure(html_backend.DEFAULT)
+
+    print(f"HTML_PARSER: {min(passing)[1]}")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,157 @@
+""" per-page parse time and memory of the scrapers on the fixture pages
+
+run from the tests folder: python benchmark_parsers.py [rounds]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from addon_modules import load, fixture_pages
+
+oxford = load('oxford')
+laban = load('laban')
+css_selectors = load('css_selectors')
+html_backend = load('html_backend')
+
+
+def measure(pages, parse, rounds):
+    """ best of rounds, seconds per page """
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for page in pages:
+            parse(page)
+        elapsed = (time.perf_counter() - start) / len(pages)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure_extraction(pages, info, rounds):
+    """ best of rounds, seconds per page spent in info(word) alone """
+    best = None
+    for _ in range(rounds):
+        words = [oxford.Word(page) for page in pages]
+        start = time.perf_counter()
+        for word in words:
+            info(word)
+        elapsed = (time.perf_counter() - start) / len(pages)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def tree_size(soup_data):
+    """ (tags, strings) of a parsed page """
+    tags = strings = 0
+    for node in soup_data.descendants:
+        if node.name is None:
+            strings += 1
+        else:
+            tags += 1
+    return tags, strings
+
+
+def measure_page(parse, page, rounds):
+    """ (best seconds, peak bytes allocated, tags, strings) of parsing one page """
+    seconds = min(timed(parse, page) for _ in range(rounds))
+    tracemalloc.start()
+    soup_data = parse(page)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (seconds, peak) + tree_size(soup_data)
+
+
+def timed(parse, page):
+    start = time.perf_counter()
+    parse(page)
+    return time.perf_counter() - start
+
+
+def laban_tree(page, full_page):
+    word = laban.Word('', full_page=full_page)
+    word.load(page)
+    return word.soup_data
+
+
+def report_regions(source, pages, full, regions, rounds):
+    """ parse time, peak memory and tree size of the whole page against PAGE_REGIONS only """
+    print(f"{source}: whole page -> page regions")
+    totals = [0, 0, 0, 0]
+    for name, page in pages:
+        (full_seconds, full_peak, full_tags, full_strings) = measure_page(full, page, rounds)
+        (seconds, peak, tags, strings) = measure_page(regions, page, rounds)
+        print(f"  {name:<12} {full_seconds * 1000:6.2f} -> {seconds * 1000:6.2f} ms"
+              f"  {full_peak / 1024:7.1f} -> {peak / 1024:7.1f} KiB"
+              f"  {full_tags + full_strings:5d} -> {tags + strings:5d} nodes")
+        for i, value in enumerate((full_seconds - seconds, full_peak - peak, full_seconds, full_peak)):
+            totals[i] += value
+    print(f"  saved {totals[0] / totals[2]:.0%} of parse time and {totals[1] / totals[3]:.0%} of peak memory")
+
+
+def built_then_decomposed(page):
+    """ how Word.load() removed the boxes before they were pruned while parsing: one select() and
+    decompose() pass per title. Return: (tree, nodes created) """
+    soup_data = html_backend.parse(page, parse_only=oxford.PAGE_REGIONS)
+    created = sum(tree_size(soup_data))
+    for title in sorted(oxford.PRUNED_TITLES):
+        for tag in css_selectors.select(soup_data, f'[title="{title}"]'):
+            tag.decompose()
+    return soup_data, created
+
+
+def report_pruning(pages, rounds):
+    """ nodes created and parse time of building the boxes and decomposing them against never building them """
+    print("oxford: build and decompose boxes -> prune while parsing")
+    totals = [0, 0, 0, 0]
+    for name, page in pages:
+        before = min(timed(built_then_decomposed, page) for _ in range(rounds))
+        after = min(timed(lambda page: oxford.Word(page), page) for _ in range(rounds))
+        created_before = built_then_decomposed(page)[1]
+        created_after = sum(tree_size(oxford.Word(page).soup_data))
+        print(f"  {name:<12} {before * 1000:6.2f} -> {after * 1000:6.2f} ms"
+              f"  {created_before:5d} -> {created_after:5d} nodes")
+        for i, value in enumerate((before, after, created_before, created_after)):
+            totals[i] += value
+    print(f"  saved {1 - totals[1] / totals[0]:.0%} of parse time and {1 - totals[3] / totals[2]:.0%} of nodes created")
+
+
+def report(title, results):
+    print(title)
+    baseline = results[0][1]
+    for label, seconds in results:
+        print(f"  {label:<40} {seconds * 1000:8.2f} ms/page {1 / seconds:8.1f} pages/s  {baseline / seconds:5.2f}x")
+
+
+def main(rounds=5):
+    report_regions('oxford', fixture_pages('oxford'), lambda page: oxford.Word(page, full_page=True).soup_data,
+                   lambda page: oxford.Word(page).soup_data, rounds)
+    report_regions('laban', fixture_pages('laban'), lambda page: laban_tree(page, True),
+                   lambda page: laban_tree(page, False), rounds)
+    report_pruning(fixture_pages('oxford'), rounds)
+
+    pages = [page for _, page in fixture_pages('oxford')]
+    print(f"{len(pages)} oxford pages, best of {rounds} rounds")
+
+    # extraction alone, on trees parsed beforehand
+    report("extraction", [
+        ('select() per field (select_info)', measure_extraction(pages, oxford.Word.select_info, rounds)),
+        ('single pass (info)', measure_extraction(pages, oxford.Word.info, rounds)),
+        ('single pass, pronunciations only', measure_extraction(
+            pages, lambda word: word.info(frozenset(['pronunciations'])), rounds)),
+    ])
+
+    report("parse and extraction", [
+        ('select() per field (select_info)', measure(pages, lambda page: oxford.Word(page).select_info(), rounds)),
+        ('single pass (info)', measure(pages, lambda page: oxford.Word(page).info(), rounds)),
+        ('html.parser events (parse_events)', measure(pages, oxford.parse_events, rounds)),
+    ])
+
+    usage = css_selectors.stats()
+    print(f"css selectors: {usage['selectors']} compiled at import in {usage['compile_ms']:.2f} ms,"
+          f" {usage['hits']} uses, compiled late: {usage['late'] or 'none'}")
+    for line in css_selectors.report()[:10]:
+        print('  ' + line)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
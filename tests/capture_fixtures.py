@@ -0,0 +1,47 @@
+""" save real Oxford and Laban pages as fixtures
+
+The pages in fixtures/<source> written by hand are generated markup. The parser
+tests pick up every .html file there, so saved pages are checked the same way:
+the single pass extractor and the event parser against Word.select_info(), the
+page regions against the full page and the html backends against html.parser.
+Saved pages are named captured-<word>.html.
+
+run from the tests folder: python capture_fixtures.py [word ...]
+"""
+
+import sys
+
+import requests
+
+from addon_modules import load, FIXTURES_PATH
+
+oxford = load('oxford')
+laban = load('laban')
+
+WORDS = ['run', 'set', 'take', 'light', 'happy', 'quickly', 'woman', 'content']
+TIMEOUT = 20
+
+
+def capture(source, word, url, headers):
+    response = requests.get(url, headers=headers, timeout=TIMEOUT)
+    response.raise_for_status()
+    path = FIXTURES_PATH / source / f"captured-{word}.html"
+    path.write_bytes(response.content)
+    print(f"{source} {word}: {len(response.content)} bytes -> {path}")
+
+
+def main(words):
+    failed = 0
+    for word in words:
+        for source, url, headers in [('oxford', oxford.Word.get_url(word, is_search=False), laban.Word.HEADERS),
+                                     ('laban', laban.Word(word).get_url(), laban.Word.HEADERS)]:
+            try:
+                capture(source, word, url, headers)
+            except requests.RequestException as error:
+                failed += 1
+                print(f"{source} {word}: {error}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:] or WORDS))
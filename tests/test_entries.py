@@ -0,0 +1,50 @@
+import pytest
+
+from addon_modules import load, fixture_pages
+
+oxford = load('oxford')
+entry_model = load('entry_model')
+entry_cache = load('entry_cache')
+
+OXFORD_PAGES = fixture_pages('oxford')
+
+
+@pytest.mark.parametrize("name, page", OXFORD_PAGES, ids=[name for name, _ in OXFORD_PAGES])
+def test_entry_reads_like_info(name, page):
+    info = oxford.Word(page).info()
+    entry = entry_model.from_info(info)
+    assert entry == info
+    assert entry.to_dict() == info
+    assert entry_model.loads(entry_model.dumps(entry)).to_dict() == info
+
+
+def test_entry_views_are_lists_and_mappings():
+    entry = entry_model.from_info(oxford.Word(dict(OXFORD_PAGES)['run']).info())
+    definition = entry['definitions'][0]['definitions'][0]
+    assert isinstance(definition.get('examples', []) + definition.get('extra_example', []), list)
+    assert entry.get('no such key') is None and 'no such key' not in entry
+
+
+def test_repeated_strings_are_shared():
+    entries = [entry_model.loads(entry_model.dumps(entry_model.from_info(oxford.Word(page).info())))
+               for _, page in OXFORD_PAGES]
+    prefixes = [pronunciation['prefix'] for entry in entries for pronunciation in entry['pronunciations']
+                if pronunciation['prefix'] == 'BrE']
+    assert len(prefixes) > 1 and all(prefix is prefixes[0] for prefix in prefixes)
+
+
+def test_entry_cache_keeps_entries_and_their_sections(tmp_path):
+    entry_cache.configure(str(tmp_path), 1)
+    try:
+        (name, page) = OXFORD_PAGES[0]
+        sections = frozenset(['pronunciations'])
+        entry = entry_model.from_info(oxford.Word(page).info(sections))
+        page_hash = entry_cache.page_hash(page)
+        entry_cache.store(page_hash, entry, sections)
+
+        assert entry_cache.load(page_hash, entry['id'], sections) == entry
+        assert entry_cache.load(page_hash, None, sections) == entry
+        assert entry_cache.load(page_hash, entry['id'], oxford.SECTIONS) is None
+        assert entry_cache.load(entry_cache.page_hash(b'changed'), entry['id'], sections) is None
+    finally:
+        entry_cache.configure(None, 1)
@@ -0,0 +1,533 @@
+import os
+import threading
+import time
+
+import pytest
+import requests
+
+from addon_modules import load
+
+http_client = load('http_client')
+http_cache = load('http_cache')
+throttle = load('throttle')
+
+
+class StubResponse(object):
+    def __init__(self, status_code=200, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.url = None
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class StubSession(object):
+    """ answers get() with the given responses (or raises the given exceptions) in order """
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        self.calls.append((url, headers))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        outcome.url = url
+        return outcome
+
+
+@pytest.fixture
+def stub_session(monkeypatch):
+    def install(*outcomes):
+        stub = StubSession(*outcomes)
+        monkeypatch.setattr(http_client, 'session', lambda: stub)
+        return stub
+
+    yield install
+    http_client.configure_throttling()
+
+
+def test_failed_probe_does_not_keep_the_breaker_open(stub_session):
+    http_client.configure_throttling(requests_per_second=0, max_retries=0, breaker_threshold=1, breaker_cooldown=0.1)
+    stub_session(requests.ConnectionError(), requests.exceptions.ChunkedEncodingError(),
+                 StubResponse(200, b'page'))
+    url = 'https://probe.example/word'
+
+    with pytest.raises(requests.ConnectionError):
+        http_client.get(url)
+    with pytest.raises(throttle.CircuitOpenError):
+        http_client.get(url)
+
+    time.sleep(0.15)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        http_client.get(url)
+    with pytest.raises(throttle.CircuitOpenError):
+        http_client.get(url)
+
+    time.sleep(0.15)
+    assert http_client.get(url).content == b'page'
+    assert not http_client.stats()['hosts']['probe.example']['paused']
+
+
+def test_retry_after_is_capped(stub_session, monkeypatch):
+    http_client.configure_throttling(requests_per_second=100, max_retries=1, breaker_threshold=0)
+    monkeypatch.setattr(http_client, 'MAX_RETRY_DELAY', 0.1)
+    stub = stub_session(StubResponse(429, headers={'Retry-After': '3600'}), StubResponse(200, b'page'))
+
+    started = time.monotonic()
+    assert http_client.get('https://capped.example/word').content == b'page'
+    assert time.monotonic() - started < 5
+    assert len(stub.calls) == 2
+
+
+def test_retry_is_not_started_past_the_deadline(stub_session):
+    http_client.configure_throttling(requests_per_second=100, max_retries=3, breaker_threshold=0)
+    stub = stub_session(StubResponse(503, headers={'Retry-After': '20'}))
+
+    started = time.monotonic()
+    with pytest.raises(throttle.RateLimitedError):
+        http_client.get('https://deadline.example/word', deadline=1)
+    assert time.monotonic() - started < 1
+    assert len(stub.calls) == 1
+
+
+def test_fail_fast_does_not_retry_or_wait(stub_session):
+    http_client.configure_throttling(requests_per_second=100, max_retries=3, breaker_threshold=0)
+    stub = stub_session(StubResponse(500), StubResponse(429, headers={'Retry-After': '5'}))
+    url = 'https://editor.example/word'
+
+    with http_client.fail_fast():
+        assert http_client.get(url).status_code == 500
+        with pytest.raises(throttle.RateLimitedError):
+            http_client.get(url)
+        # the host asked to wait, the next request gives up instead of sleeping
+        started = time.monotonic()
+        with pytest.raises(throttle.RateLimitedError):
+            http_client.get(url)
+        assert time.monotonic() - started < 1
+    assert len(stub.calls) == 2
+
+
+def test_fail_fast_reaches_the_io_pool():
+    io_pool = load('io_pool')
+    with http_client.fail_fast():
+        future = io_pool.submit(http_client._fail_fast.get)
+    assert future.result() is True
+    assert io_pool.submit(http_client._fail_fast.get).result() is False
+
+
+def test_negative_cache_survives_a_profile_switch(tmp_path):
+    negative_cache = load('negative_cache')
+    negative_cache.configure(str(tmp_path / 'not_found.sqlite'))
+    try:
+        negative_cache.add('oxford', 'misspeled')
+        negative_cache.close()
+        assert negative_cache.contains('oxford', 'misspeled')
+        negative_cache.add('laban', 'misspeled')
+        negative_cache.purge('misspeled')
+        assert not negative_cache.contains('laban', 'misspeled')
+    finally:
+        negative_cache.configure(None)
+
+
+@pytest.fixture
+def index(tmp_path):
+    """ resolution_index in tmp_path, returns the path of its file """
+    resolution_index = load('resolution_index')
+    path = tmp_path / 'resolution_index.jsonl'
+    resolution_index.configure(str(path))
+    yield path
+    resolution_index.configure(None)
+
+
+def test_resolution_index_is_read_again_after_close(index):
+    resolution_index = load('resolution_index')
+    resolution_index.put('Ice Cream', 'ice-cream', ['ice-cream_2'])
+    resolution_index.put('run', 'run_1', ['run_2'])
+    resolution_index.remove('run')
+    resolution_index.close()
+    assert resolution_index.get('ice cream') == ('ice-cream', ['ice-cream_2'])
+    assert resolution_index.get('run') is None
+
+    resolution_index.configure(str(index))
+    assert resolution_index.get('ice-cream') == ('ice-cream', ['ice-cream_2'])
+
+
+def test_resolution_index_skips_a_line_cut_short(index):
+    resolution_index = load('resolution_index')
+    resolution_index.put('cat', 'cat_1', [])
+    with open(index, 'a', encoding='utf-8') as f:
+        f.write('{"query": "dog", "primary": "do')
+    resolution_index.close()
+
+    assert resolution_index.get('cat') == ('cat_1', [])
+    assert resolution_index.get('dog') is None
+    # the next record starts on a line of its own
+    resolution_index.put('dog', 'dog_1', [])
+    resolution_index.close()
+    assert resolution_index.get('dog') == ('dog_1', [])
+    assert resolution_index.get('cat') == ('cat_1', [])
+
+
+def test_resolution_index_compaction_keeps_the_latest_entries(index):
+    resolution_index = load('resolution_index')
+    for i in range(200):
+        resolution_index.put('set', 'set_%d' % (i % 3), [])
+    resolution_index.put('go', 'go_1', ['go_2'])
+    resolution_index.remove('go')
+    resolution_index.put('take', 'take_1', ['take_2'])
+    resolution_index.close()
+
+    assert resolution_index.get('set') == ('set_1', [])
+    assert resolution_index.get('go') is None
+    assert resolution_index.get('take') == ('take_1', ['take_2'])
+    assert len(index.read_text(encoding='utf-8').splitlines()) == 2
+
+
+def test_media_index_without_a_profile():
+    media_index = load('media_index')
+    media_index.reset()
+    assert media_index.path('cat.mp3') is None
+    assert not media_index.contains('cat.mp3')
+
+
+def test_media_index_sees_files_deleted_by_the_user(tmp_path):
+    media_index = load('media_index')
+    (tmp_path / 'cat.mp3').write_bytes(b'ID3')
+    media_index.configure(str(tmp_path))
+    try:
+        assert media_index.path('cat.mp3') == str(tmp_path / 'cat.mp3')
+        assert media_index.contains('cat.mp3')
+        assert not media_index.contains('dog.mp3')
+
+        (tmp_path / 'cat.mp3').unlink()
+        assert not media_index.contains('cat.mp3')
+        (tmp_path / 'dog.mp3').write_bytes(b'ID3')
+        media_index.add('dog.mp3')
+        assert media_index.contains('dog.mp3')
+    finally:
+        media_index.reset()
+
+
+class Clock(object):
+    """ time.time() that only moves when told to """
+
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """ http_cache in tmp_path on a fake clock, install(*outcomes) answers the requests """
+    clock = Clock()
+    monkeypatch.setattr(time, 'time', clock)
+
+    def install(*outcomes, **settings):
+        stub = StubSession(*outcomes)
+        monkeypatch.setattr(http_cache.http_client, 'get',
+                            lambda url, headers=None, timeout=None: stub.get(url, headers=headers))
+        http_cache.configure(str(tmp_path), **settings)
+        return stub
+
+    install.clock = clock
+    yield install
+    http_cache.configure(None)
+
+
+def test_cache_serves_fresh_pages_and_revalidates_stale_ones(cache):
+    stub = cache(StubResponse(200, b'page', {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}),
+                 StubResponse(304), ttl=60)
+    url = 'https://www.example.com/word'
+
+    assert http_cache.get(url).content == b'page'
+    assert http_cache.get(url).content == b'page'
+    assert len(stub.calls) == 1
+
+    cache.clock.now += 61
+    response = http_cache.get(url, headers={'User-Agent': 'test'})
+    assert response.content == b'page' and response.from_cache
+    assert stub.calls[1][1] == {'User-Agent': 'test', 'If-None-Match': '"v1"',
+                                'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+
+    # the 304 made the entry fresh again
+    cache.clock.now += 30
+    assert http_cache.get(url).content == b'page'
+    assert len(stub.calls) == 2
+
+
+def test_cache_replaces_an_expired_page(cache):
+    stub = cache(StubResponse(200, b'old'), StubResponse(200, b'new'), StubResponse(404), ttl=60)
+    url = 'https://www.example.com/word'
+
+    http_cache.get(url)
+    cache.clock.now += 61
+    assert http_cache.get(url).content == b'new'
+    assert http_cache.get(url).content == b'new'
+
+    # only 200 responses are stored
+    missing = 'https://www.example.com/missing'
+    assert http_cache.get(missing).status_code == 404
+    assert len(stub.calls) == 3
+
+
+def test_prune_drops_entries_older_than_max_age(cache, tmp_path):
+    cache(StubResponse(200, b'first'), StubResponse(200, b'second'), StubResponse(200, b'first again'),
+          max_age=3600, max_bytes=0)
+    http_cache.get('https://www.example.com/first')
+    cache.clock.now += 1800
+    http_cache.get('https://www.example.com/second')
+
+    cache.clock.now += 1801
+    assert http_cache.prune() == 1
+    assert http_cache.get('https://www.example.com/second').content == b'second'
+    assert http_cache.get('https://www.example.com/first').content == b'first again'
+    # the body of the dropped entry went with it
+    assert len(list((tmp_path / 'bodies').iterdir())) == 2
+
+
+def test_prune_keeps_a_body_written_just_before_its_entry(cache, tmp_path):
+    cache(StubResponse(200, b'page'))
+    http_cache.get('https://www.example.com/word')
+    orphan = tmp_path / 'bodies' / 'orphan'
+    orphan.write_bytes(b'being stored')
+    os.utime(orphan, (cache.clock.now, cache.clock.now))
+
+    http_cache.prune()
+    assert orphan.exists()
+    cache.clock.now += http_cache.ORPHAN_GRACE + 1
+    http_cache.prune()
+    assert not orphan.exists()
+    assert len(list((tmp_path / 'bodies').iterdir())) == 1
+
+
+def test_prune_keeps_the_bodies_under_max_bytes(cache, tmp_path):
+    pages = [('https://www.example.com/%d' % i, bytes([i]) * 100) for i in range(4)]
+    stub = cache(*[StubResponse(200, body) for _, body in pages], StubResponse(200, pages[0][1]), max_bytes=250)
+    for url, _ in pages:
+        http_cache.get(url)
+        cache.clock.now += 1
+
+    assert http_cache.prune() == 2
+    assert sum(path.stat().st_size for path in (tmp_path / 'bodies').iterdir()) <= 250
+    # the latest pages are kept, the oldest is downloaded again
+    for url, body in pages[2:]:
+        assert http_cache.get(url).content == body
+    assert len(stub.calls) == 4
+    http_cache.get(pages[0][0])
+    assert len(stub.calls) == 5
+
+
+def coalesced_calls(group, key, func, callers=4):
+    """ run callers threads calling group.do(key, func) while the first call blocks,
+    return [(result, error), ...] of every caller """
+    release = threading.Event()
+    started = threading.Event()
+    outcomes = []
+
+    def leader_func():
+        started.set()
+        release.wait(5)
+        return func()
+
+    def call(target):
+        try:
+            outcomes.append((group.do(key, target), None))
+        except Exception as error:
+            outcomes.append((None, error))
+
+    threads = [threading.Thread(target=call, args=(leader_func,))]
+    threads[0].start()
+    started.wait(5)
+    threads += [threading.Thread(target=call, args=(func,)) for _ in range(callers - 1)]
+    for thread in threads[1:]:
+        thread.start()
+    # the followers are waiting once they are counted as coalesced
+    while group.stats()['coalesced'] < callers - 1:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_singleflight_shares_one_result():
+    singleflight = load('singleflight')
+    group = singleflight.Group()
+    calls = []
+    outcomes = coalesced_calls(group, ('oxford', 'run', True), lambda: calls.append(1) or ['entry'])
+
+    assert calls == [1]
+    assert len(outcomes) == 4 and all(result == ['entry'] and error is None for result, error in outcomes)
+    assert group.stats() == {'calls': 1, 'coalesced': 3}
+
+
+def test_singleflight_shares_one_error_and_forgets_it():
+    singleflight = load('singleflight')
+    group = singleflight.Group()
+    failure = requests.ConnectionError('down')
+
+    def fail():
+        raise failure
+
+    outcomes = coalesced_calls(group, ('laban', 'run'), fail)
+    assert len(outcomes) == 4 and all(result is None and error is failure for result, error in outcomes)
+
+    # a failed call is not remembered, the next one runs again
+    assert group.do(('laban', 'run'), lambda: 'entry') == 'entry'
+    assert group.stats() == {'calls': 2, 'coalesced': 3}
+
+
+class StubDownload(StubResponse):
+    """ streamed response handing out content in chunks """
+
+    def __init__(self, content, headers=None, status_code=200):
+        super().__init__(status_code, content, headers)
+
+    def raise_for_status(self):
+        if self.status_code != 200:
+            raise requests.HTTPError(self.status_code)
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), 3):
+            yield self.content[start:start + 3]
+
+
+@pytest.fixture
+def downloader(monkeypatch):
+    audio_downloader = load('audio_downloader')
+
+    def install(response):
+        monkeypatch.setattr(audio_downloader.http_client, 'get', lambda url, **kwargs: response)
+        return audio_downloader.AudioDownloader(max_workers=1)
+
+    yield install
+
+
+MP3 = b'ID3\x04\x00' + b'\x00' * 20
+
+
+def test_audio_is_written_in_place(downloader, tmp_path):
+    path = tmp_path / 'run__gb_1.mp3'
+    audio = downloader(StubDownload(MP3, {'Content-Length': str(len(MP3))}))
+    try:
+        assert audio.submit('https://audio.example/run.mp3', str(path)).result(5) == str(path)
+    finally:
+        audio.shutdown()
+    assert path.read_bytes() == MP3
+    assert [child.name for child in tmp_path.iterdir()] == [path.name]
+    assert audio.stats()['downloaded'] == 1
+
+
+@pytest.mark.parametrize("response", [
+    StubDownload(MP3, {'Content-Length': str(len(MP3) + 100)}),
+    StubDownload(b'<html>blocked</html>'),
+    StubDownload(b''),
+    StubDownload(b'Not Found', status_code=404),
+], ids=['truncated', 'not audio', 'empty', 'http error'])
+def test_bad_audio_download_leaves_no_file(downloader, tmp_path, response):
+    audio_downloader = load('audio_downloader')
+    path = tmp_path / 'run__gb_1.mp3'
+    audio = downloader(response)
+    try:
+        future = audio.submit('https://audio.example/run.mp3', str(path))
+        with pytest.raises((audio_downloader.AudioDownloadError, requests.HTTPError)):
+            future.result(5)
+    finally:
+        audio.shutdown()
+    # neither the target nor the .part file it was streamed to
+    assert list(tmp_path.iterdir()) == []
+    assert audio.stats()['failed'] == 1
+
+
+def test_prewarm_stops_at_its_own_request_budget(stub_session):
+    prewarm = load('prewarm')
+    io_pool = load('io_pool')
+    http_client.configure_throttling(requests_per_second=0, breaker_threshold=0)
+    stub_session(*[StubResponse(200) for _ in range(100)])
+    warmed = []
+
+    def warm(word):
+        # a lookup the user starts meanwhile, on a thread of its own
+        typing = threading.Thread(target=http_client.get, args=('https://typing.example/' + word,))
+        typing.start()
+        typing.join()
+        http_client.get('https://oxford.example/' + word)
+        # requests of the io_pool threads the warm starts are its own
+        io_pool.submit(http_client.get, 'https://laban.example/' + word).result()
+        warmed.append(word)
+
+    prewarmer = prewarm.Prewarmer(warm, request_budget=5, interval=0)
+    prewarmer.start(['word%d' % i for i in range(10)])
+    prewarmer._thread.join(5)
+
+    # 2 requests a word, the budget is checked before each word
+    assert warmed == ['word0', 'word1', 'word2']
+    assert prewarmer.stats() == {'queued': 10, 'warmed': 3, 'failed': 0, 'requests': 6}
+
+
+def test_prewarm_stops_when_a_host_is_unavailable():
+    prewarm = load('prewarm')
+    warmed = []
+
+    def warm(word):
+        warmed.append(word)
+        raise throttle.CircuitOpenError('oxford.example', 60)
+
+    prewarmer = prewarm.Prewarmer(warm, request_budget=0, interval=0)
+    prewarmer.start(['a', 'b'])
+    prewarmer._thread.join(5)
+    assert warmed == ['a']
+    assert prewarmer.stats()['failed'] == 1
+
+
+def test_prefetch_follows_the_latest_word():
+    prefetch = load('prefetch')
+    fetched = []
+    release = threading.Event()
+
+    def fetch(word):
+        fetched.append(word)
+        release.wait(5)
+        return word
+
+    prefetcher = prefetch.SpeculativePrefetcher(fetch, delay=0.05)
+    try:
+        # typed over before the delay: never fetched
+        prefetcher.schedule('ca')
+        prefetcher.schedule('cat')
+        time.sleep(0.3)
+        # typed over while running: wasted
+        prefetcher.schedule('cats')
+        time.sleep(0.3)
+        # typed over while queued behind the running one: cancelled
+        prefetcher.schedule('catsup')
+        time.sleep(0.3)
+        release.set()
+
+        future = prefetcher.take('catsup')
+        assert future.result(5) == 'catsup'
+        assert prefetcher.take('cat') is None
+        assert fetched == ['cat', 'catsup']
+        assert prefetcher.stats() == {'scheduled': 4, 'started': 3, 'used': 1, 'cancelled': 1, 'wasted': 1}
+    finally:
+        release.set()
+        prefetcher.shutdown()
+
+
+def test_prefetch_disabled_never_fetches():
+    prefetch = load('prefetch')
+    fetched = []
+    prefetcher = prefetch.SpeculativePrefetcher(fetched.append, delay=0, enabled=False)
+    prefetcher.schedule('cat')
+    time.sleep(0.1)
+    assert prefetcher.take('cat') is None
+    assert fetched == []
+    assert prefetcher.stats()['scheduled'] == 0
+    prefetcher.shutdown()
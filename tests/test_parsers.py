@@ -0,0 +1,240 @@
+import itertools
+import re
+import threading
+
+import pytest
+
+from addon_modules import load, fixture_pages, KNOWN_BACKEND_DIFFERENCES
+
+oxford = load('oxford')
+laban = load('laban')
+
+OXFORD_PAGES = fixture_pages('oxford')
+LABAN_PAGES = fixture_pages('laban')
+
+
+def laban_info(page, full_page=False):
+    word = laban.Word('', full_page=full_page)
+    word.load(page)
+    return word.parse()
+
+
+def without_references(value):
+    if isinstance(value, dict):
+        return {key: without_references(item) for key, item in value.items() if key != 'references'}
+    if isinstance(value, list):
+        return [without_references(item) for item in value]
+    return value
+
+
+def only_sections(info, sections):
+    """ info as extracted with sections, from the full info """
+    info = {key: value for key, value in info.items() if key not in oxford.SECTIONS or key in sections}
+    return info if 'references' in sections else without_references(info)
+
+
+@pytest.mark.parametrize("name, page", OXFORD_PAGES, ids=[name for name, _ in OXFORD_PAGES])
+def test_single_pass_extractor_matches_selectors(name, page):
+    expected = oxford.Word(page).select_info()
+    word = oxford.Word(page)
+    assert word.info() == expected
+    assert word.idioms() == expected['idioms']
+
+
+@pytest.mark.parametrize("name, page", OXFORD_PAGES, ids=[name for name, _ in OXFORD_PAGES])
+def test_oxford_page_regions_match_full_page(name, page):
+    assert oxford.Word(page).info() == oxford.Word(page, full_page=True).info()
+
+
+@pytest.mark.parametrize("name, page", LABAN_PAGES, ids=[name for name, _ in LABAN_PAGES])
+def test_laban_page_regions_match_full_page(name, page):
+    assert laban_info(page) == laban_info(page, full_page=True)
+
+
+@pytest.mark.parametrize("name, page", OXFORD_PAGES, ids=[name for name, _ in OXFORD_PAGES])
+def test_event_parser_matches_tree(name, page):
+    assert oxford.parse_events(page) == oxford.Word(page).info()
+
+
+def every_other(pattern, replace):
+    """ markup change replacing every other match of pattern """
+    def change(page):
+        counter = itertools.count()
+        return re.sub(pattern, lambda match: replace(match) if next(counter) % 2 == 0 else match.group(0), page)
+    return change
+
+
+# markup real pages have and the generated fixtures do not, the event parser has to follow bs4 through all of it
+MARKUP_CHANGES = {
+    'no end of li': lambda page: re.sub(rb'</li\s*>', b'', page),
+    'no end of p': lambda page: re.sub(rb'</p\s*>', b'', page),
+    'no end of some spans': every_other(rb'</span>', lambda match: b''),
+    'stray end tags': every_other(rb'</span>', lambda match: b'</span></div></b></i>'),
+    'uppercase tags': lambda page: re.sub(rb'<(/?)([a-z]+)',
+                                          lambda match: b'<' + match.group(1) + match.group(2).upper(), page),
+    'script and style': lambda page: page.replace(
+        b'<div id="entryContent">',
+        b'<div id="entryContent"><script>var x = "<span class=\'def\'>no</span></div>";</script>'
+        b'<style>p > span{}</style>', 1),
+    'entities without semicolon': lambda page: page.replace(b'&nbsp;', b'&nbsp').replace(b'&amp;', b'&amp'),
+    'self closing spans': every_other(rb'<span([^>]*)></span>', lambda match: b'<span' + match.group(1) + b'/>'),
+    'crlf': lambda page: page.replace(b'\n', b'\r\n'),
+    'unquoted attributes': lambda page: re.sub(rb'class="([a-z_-]+)"', rb'class=\1', page),
+    'comments and cdata': every_other(rb'</span>', lambda match: b'<!-- </span> --><![CDATA[x]]></span>'),
+    'declarations': lambda page: re.sub(rb'(<div id="(?:entryContent|relatedentries)">)',
+                                        rb'\1<! bogus ><!DOCTYPE html><?pi x?>', page),
+    'br variants': lambda page: page.replace(b'<br>', b'</br>'),
+    'nested links': every_other(rb'<a ', lambda match: b'<a href="#"><a '),
+    'whitespace between tags': lambda page: re.sub(rb'>(\s*)<', rb'> \n\t <', page),
+    'void tags': every_other(rb'</span>', lambda match: b'</span><img src="x"><hr><wbr>'),
+    'table bits': every_other(rb'<li', lambda match: b'<td>cell</tr><li'),
+}
+
+
+@pytest.mark.parametrize("change", MARKUP_CHANGES)
+def test_extractors_agree_on_irregular_markup(change):
+    for name, page in OXFORD_PAGES:
+        page = MARKUP_CHANGES[change](page)
+        expected = oxford.Word(page).select_info()
+        assert oxford.Word(page).info() == expected, name
+        assert oxford.parse_events(page) == expected, name
+
+
+def test_event_parser_decodes_like_the_tree():
+    # utf-8 bytes under a wrong charset declaration, the tree is built from utf-8 whatever the page says
+    page = dict(OXFORD_PAGES)['cat'].replace(b'<head>', b'<head><meta charset="windows-1252">', 1)
+    expected = oxford.Word(page).info()
+    assert expected['pronunciations'] == oxford.Word(dict(OXFORD_PAGES)['cat']).info()['pronunciations']
+    assert oxford.parse_events(page) == expected
+
+
+@pytest.mark.parametrize("name, page", LABAN_PAGES, ids=[name for name, _ in LABAN_PAGES])
+def test_laban_keeps_every_definition_and_example(name, page):
+    word = laban.Word('')
+    word.load(page)
+    entry = word.soup_data.select(laban.CONTENT_SELECTOR)
+    info = word.parse()
+    definitions = [definition for wordform in info['definitions'] for definition in wordform['definitions']]
+    idiom_definitions = [definition for idiom in info['idioms'] for definition in idiom['definitions']]
+    examples = [example for definition in definitions + idiom_definitions for example in definition['examples']]
+    assert len(definitions) == sum(len(div.select(':scope > div.green.bold')) for div in entry)
+    assert len(idiom_definitions) == sum(len(div.select(':scope > div.grey.bold')) for div in entry)
+    assert len(examples) == sum(len(div.select(':scope > div.color-light-blue')) for div in entry)
+
+
+def test_scraper_selectors_are_compiled_at_import():
+    css_selectors = load('css_selectors')
+    for _, page in OXFORD_PAGES:
+        oxford.Word(page).select_info()
+    for _, page in LABAN_PAGES:
+        laban_info(page)
+    assert css_selectors.stats()['late'] == []
+
+
+def test_selector_hits_are_counted_from_every_thread():
+    css_selectors = load('css_selectors')
+    selector = css_selectors.Selector('span')
+    soup_data = oxford.Word(OXFORD_PAGES[0][1]).soup_data
+    threads = [threading.Thread(target=lambda: [selector.select(soup_data, limit=1) for _ in range(500)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert selector.hits == 8 * 500
+
+
+PLANS = [frozenset(), frozenset(['pronunciations']), frozenset(['definitions', 'idioms', 'verb_forms']),
+         frozenset(['idioms', 'references']), oxford.SECTIONS - {'phrasal_verbs', 'references'}]
+
+
+@pytest.mark.parametrize("sections", PLANS, ids=[' '.join(sorted(plan)) or 'none' for plan in PLANS])
+@pytest.mark.parametrize("name, page", OXFORD_PAGES, ids=[name for name, _ in OXFORD_PAGES])
+def test_oxford_sections_left_out(name, page, sections):
+    expected = only_sections(oxford.Word(page).info(), sections)
+    assert oxford.Word(page).info(sections) == expected
+    assert oxford.parse_events(page, sections) == expected
+
+
+def test_missing_html_backend_falls_back_to_html_parser():
+    html_backend = load('html_backend')
+    try:
+        assert html_backend.configure('no such parser') == 'html.parser'
+        for backend in html_backend.BACKENDS:
+            expected = backend if backend in html_backend.available() else 'html.parser'
+            assert html_backend.configure(backend) == expected
+    finally:
+        html_backend.configure(html_backend.DEFAULT)
+
+
+def backend_cases():
+    pages = ([('oxford/' + name, lambda page: oxford.Word(page).info(), page) for name, page in OXFORD_PAGES] +
+             [('laban/' + name, laban_info, page) for name, page in LABAN_PAGES])
+    return [pytest.param(backend, parse, page, id=f"{backend}-{name}",
+                         marks=[pytest.mark.xfail(strict=True, reason="known backend difference")]
+                         if (backend, name) in KNOWN_BACKEND_DIFFERENCES else [])
+            for backend in load('html_backend').available() for name, parse, page in pages]
+
+
+@pytest.mark.parametrize("backend, parse, page", backend_cases())
+def test_html_backend_builds_same_entries(backend, parse, page):
+    html_backend = load('html_backend')
+    expected = parse(page)
+    assert html_backend.configure(backend) == backend
+    try:
+        assert parse(page) == expected
+    finally:
+        html_backend.configure(html_backend.DEFAULT)
+
+
+def test_html_backend_failing_self_check_is_not_used(monkeypatch):
+    html_backend = load('html_backend')
+    others = [backend for backend in html_backend.available() if backend != html_backend.DEFAULT]
+    if not others:
+        pytest.skip("only html.parser is installed")
+    # a page the backends build differently
+    monkeypatch.setattr(html_backend, 'SELF_CHECK_PAGE', b'<div id="entryContent">&unknownentity;</div>')
+    try:
+        for backend in others:
+            assert html_backend.configure(backend) == html_backend.DEFAULT
+    finally:
+        html_backend.configure(html_backend.DEFAULT)
+
+
+def nodes(soup_data):
+    """ every tag and string of the tree in document order, strings are not merged """
+    return [(type(node).__name__, node.name, node.attrs) if node.name else (type(node).__name__, str(node))
+            for node in soup_data.descendants]
+
+
+TRICKY_BOXES = [
+    b'<div id="entryContent"><p>before<span title="Word Origin">origin<br>text <img src="x"></span>after</p></div>',
+    b'<div id="entryContent"><div title="Collocations"><div title="Word Origin">a</div><p>b</div>c</div>',
+    b'<div id="entryContent"><section><div title="Collocations"><p>unclosed</section><span>next</span></div>',
+    b'<div id="entryContent"><img title="Word Origin"><span>kept</span><div title="Collocations"/>kept</div>',
+    b'<div id="entryContent"><div title="Express Yourself">x</br></div><!-- c --><span>y</span></p></div>',
+]
+
+
+@pytest.mark.parametrize("page", [page for _, page in OXFORD_PAGES] + TRICKY_BOXES,
+                         ids=[name for name, _ in OXFORD_PAGES] + [f"tricky{i}" for i in range(len(TRICKY_BOXES))])
+def test_pruned_boxes_are_never_built(page):
+    html_backend = load('html_backend')
+    for parse_only in (oxford.PAGE_REGIONS, None):
+        decomposed = html_backend.parse(page, parse_only=parse_only)
+        for tag in decomposed.find_all(title=lambda title: title in oxford.PRUNED_TITLES):
+            tag.decompose()
+        pruned = html_backend.parse(page, parse_only=parse_only, prune_titles=oxford.PRUNED_TITLES)
+        assert nodes(pruned) == nodes(decomposed)
+        assert pruned.find(title=lambda title: title in oxford.PRUNED_TITLES) is None
+
+
+def test_entry_matcher_drivers_must_implement_the_text_helpers():
+    class Incomplete(oxford._EntryMatcher):
+        def text_without_spans(self, node):
+            return ''
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    oxford._TreeExtractor(oxford.Word(OXFORD_PAGES[0][1]).soup_data)
+    oxford._EventExtractor()
@@ -77,3 +77,25 @@ def test_my_addon(anki_session: AnkiSession):
             assert len(result[2]) > 0
             assert len(result[3]) > 0
             print(result)
+
+
+@pytest.mark.parametrize("anki_session", [dict(load_profile=True)], indirect=True)
+def test_laban_failure_keeps_oxford_fields(anki_session: AnkiSession, monkeypatch):
+    anki_session.create_addon_config("AutoDefineAddon", config, config)
+    autodefine = anki_session.load_addon("AutoDefineAddon").autodefine
+    page = (Path(__file__).parent / 'fixtures' / 'oxford' / 'cat.html').read_bytes()
+    entry = autodefine.parse_oxford_page(page)
+
+    def laban_is_down(word):
+        raise requests.exceptions.ConnectionError("dict.laban.vn is down")
+
+    monkeypatch.setattr(autodefine, 'AUDIO', False)
+    monkeypatch.setattr(autodefine, 'VI_DEFINITION', True)
+    monkeypatch.setattr(autodefine, 'get_words_info', lambda word: ([entry], entry.get('idioms', [])))
+    monkeypatch.setattr(autodefine, 'get_laban_word_info', laban_is_down)
+
+    data = autodefine.fetch_data('cat', is_bulk=True)
+    assert len(data['fields'][1]) > 0
+    assert len(data['fields'][3]) > 0
+    assert autodefine.VI_DEFINITION_FIELD not in data['fields']
+    assert data['errors'] == ["Laban dictionary failed: dict.laban.vn is down"]